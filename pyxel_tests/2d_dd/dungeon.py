@@ -0,0 +1,127 @@
+# ======================================================================
+# CHUNKED DUNGEON
+# ======================================================================
+# A level split in fixed-width column chunks. Only a few chunks live in
+# memory at once, copied in slots of a cache tilemap: they are loaded
+# (or generated) when the camera gets close and the least recently used
+# ones, far behind the party, are evicted to make room.
+
+import random
+from collections import OrderedDict
+
+import pyxel
+
+
+
+class ChunkedDungeon:
+    def __init__(self, chunks, chunk_width, height, tile_size, cache_tm, load_chunk,
+                 capacity = None):
+
+        # Level dimensions (tiles)
+        self.chunks = chunks
+        self.chunk_width = chunk_width
+        self.height = height
+        self.tile_size = tile_size
+        self.width = chunks * chunk_width
+
+        # Cache tilemap, split in chunk-wide slots
+        self.cache_tm = cache_tm
+        self.cache = pyxel.tilemaps[cache_tm]
+        slots = self.cache.width // chunk_width
+        self.capacity = min(capacity or slots, slots)
+        self.free_slots = list(reversed(range(self.capacity)))
+
+        # load_chunk(index, tilemap, x) writes a chunk at column x
+        self.load_chunk = load_chunk
+
+        # Chunks in the cache: chunk index -> slot, least recently used first
+        self.resident = OrderedDict()
+
+        # Stats
+        self.loads = 0
+        self.evictions = 0
+
+
+    def chunk_at(self, x):
+        # Chunk under a pixel position
+        return int(x // (self.chunk_width * self.tile_size))
+
+
+    def require(self, index):
+        # Slot of a chunk, loaded if needed
+        slot = self.resident.get(index)
+        if slot is not None:
+            self.resident.move_to_end(index)
+            return slot
+
+        # Full: evict the least recently used chunk
+        if not self.free_slots:
+            evicted, free_slot = self.resident.popitem(last = False)
+            self.free_slots.append(free_slot)
+            self.evictions += 1
+
+        slot = self.free_slots.pop()
+        self.load_chunk(index, self.cache, slot * self.chunk_width)
+        self.resident[index] = slot
+        self.loads += 1
+        return slot
+
+
+    def prefetch(self, x_min, x_max, ahead = 1):
+        # Load the chunks between two pixel positions, plus a few ahead
+        # and one behind, so they are ready before the camera gets there
+        first = max(self.chunk_at(x_min) - 1, 0)
+        last = min(self.chunk_at(x_max) + ahead, self.chunks - 1)
+        for index in range(first, last + 1):
+            self.require(index)
+
+
+    def tile(self, tx, ty):
+        # Tile at a level position, like tilemap.pget
+        index = tx // self.chunk_width
+        slot = self.require(index)
+        return self.cache.pget(slot * self.chunk_width + tx % self.chunk_width, ty)
+
+
+    def draw(self, first_column, last_column, colkey = None):
+        # Draw the level columns [first_column, last_column[ at their level
+        # position, one bltm per chunk
+        size = self.tile_size
+        column = first_column
+
+        while column < last_column:
+            index = column // self.chunk_width
+            chunk_start = index * self.chunk_width
+            chunk_end = min(chunk_start + self.chunk_width, last_column)
+            slot = self.require(index)
+
+            pyxel.bltm(
+                x = column * size,
+                y = 0,
+                tm = self.cache_tm,
+                u = (slot * self.chunk_width + column - chunk_start) * size,
+                v = 0,
+                w = (chunk_end - column) * size,
+                h = self.height * size,
+                colkey = colkey
+            )
+
+            column = chunk_end
+
+
+
+def authored_chunks(source_tm, source_chunks, chunk_width, height, seed = 0):
+    # Chunk loader building a long level out of the chunks of an authored
+    # tilemap: the level starts with them in order, then picks them at
+    # random (the same ones for the same seed and chunk index)
+    source = pyxel.tilemaps[source_tm]
+
+    def load_chunk(index, tilemap, x):
+        if index < source_chunks:
+            pick = index
+        else:
+            pick = random.Random(seed * 1000003 + index).randrange(source_chunks)
+
+        tilemap.blt(x, 0, source, pick * chunk_width, 0, chunk_width, height)
+
+    return load_chunk
@@ -0,0 +1,76 @@
+# ======================================================================
+# PARTY FORMATION
+# ======================================================================
+# Follow the leader: every step of the leader goes in a ring buffer of
+# positions, allocated once, and each follower takes the position the
+# leader had a fixed number of steps ago. The party walks in the leader's
+# footsteps (and turns around behind it), and a step costs the same for 3
+# or 300 followers: one write in the buffer and one gather per axis.
+
+import numpy as np
+
+
+
+class Formation:
+    def __init__(self, store, leader, followers, step):
+
+        # Entity store rows of the leader and of the followers
+        self.store = store
+        self.leader = leader
+        self.followers = np.array(followers, dtype = np.intp)
+
+        # Steps behind the leader, from the start distance of each follower
+        # (step = distance walked by the leader in one step)
+        leader_x = store.X[leader]
+        leader_y = store.Y[leader]
+        distances = np.hypot(store.X[self.followers] - leader_x, store.Y[self.followers] - leader_y)
+        self.delays = np.maximum(np.rint(distances / step), 1).astype(np.intp)
+
+        # Ring buffer of the last leader positions, head = last step
+        self.capacity = int(self.delays.max()) + 1
+        self.history_x = np.empty(self.capacity)
+        self.history_y = np.empty(self.capacity)
+        self.head = 0
+
+        # Buffers reused by every step
+        self.index = np.empty(len(self.followers), dtype = np.intp)
+        self.sample = np.empty(len(self.followers))
+
+        self.fill(leader_x, leader_y)
+
+
+    def fill(self, leader_x, leader_y):
+        # Start history: a straight line from the leader to each follower
+        # in turn, so the party keeps its start formation
+        members = sorted(zip(
+            [0] + self.delays.tolist(),
+            [leader_x] + self.store.X[self.followers].tolist(),
+            [leader_y] + self.store.Y[self.followers].tolist()
+        ))
+
+        for (d0, x0, y0), (d1, x1, y1) in zip(members, members[1:]):
+            for d in range(d0, d1 + 1):
+                t = (d - d0) / (d1 - d0) if d1 > d0 else 0.0
+                slot = (self.head - d) % self.capacity
+                self.history_x[slot] = x0 + (x1 - x0) * t
+                self.history_y[slot] = y0 + (y1 - y0) * t
+
+
+    def advance(self):
+        # The leader took a step: record it and move the followers
+        self.head = (self.head + 1) % self.capacity
+        self.history_x[self.head] = self.store.X[self.leader]
+        self.history_y[self.head] = self.store.Y[self.leader]
+
+        np.subtract(self.head, self.delays, out = self.index)
+        np.mod(self.index, self.capacity, out = self.index)
+
+        np.take(self.history_x, self.index, out = self.sample)
+        self.store.X[self.followers] = self.sample
+        np.take(self.history_y, self.index, out = self.sample)
+        self.store.Y[self.followers] = self.sample
+
+
+    def min_x(self):
+        # Leftmost follower position
+        return np.take(self.store.X, self.followers, out = self.sample).min().item()
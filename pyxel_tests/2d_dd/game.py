@@ -1,63 +1,35 @@
-import pyxel
-
-
-
-TILE_SIZE = 8
-CHARACTER_SIZE = 16
-
-SCREEN_HEIGHT = 16
-SCREEN_WIDTH = 16
-
-FLOOR = 8 * TILE_SIZE - CHARACTER_SIZE
-
-HERO_SPACING = 10
-HERO_SPEED = 2
+import os
+import sys
 
-ANIMATION_DELAY = 4
-
-
-
-class Dungeon:
-    # Dungeon dimensions
-    HEIGHT = 16
-    WIDTH = 16 * 2
+import pyxel
 
+# Shared pyxel_tests modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import assets
+from common.loop import FixedTimestep
+from dungeon import ChunkedDungeon, authored_chunks
+import party
+from party import Dungeon, SCREEN_HEIGHT, SCREEN_WIDTH, TILE_SIZE, new_game
 
 
-class Hero:
-    def __init__(self, u, v, order, spritesheet):
-        # Sprites
-        self.IMG = 1
-        self.U = u
-        self.V = v
-        self.WIDTH = CHARACTER_SIZE
-        self.HEIGHT = CHARACTER_SIZE
 
-        # Position
-        self.ORDER = order
-        self.X = 4 + 3 * HERO_SPACING - self.ORDER * HERO_SPACING
-        self.Y = FLOOR
+# Chunks of the level: the authored level, Dungeon.LONG_CHUNKS for a long
+# level of random picks of the authored chunks
+CHUNKS = Dungeon.CHUNKS
 
-        # Movement
-        self.SPEED = HERO_SPEED
 
-        # Animations
-        self.SPRITES = spritesheet * CHARACTER_SIZE
-        self.ANIM_TICK = 1
-        self.ANIM_SPRITES = {
-            "idle": [(u, v + self.SPRITES),
-                     (u + CHARACTER_SIZE, v + self.SPRITES)],
-            "walk": [(u, v + self.SPRITES),
-                     (u + CHARACTER_SIZE * 2, v + self.SPRITES)]
-        }
+class Hero(party.Hero):
+    # Pyxel front-end of a hero: draws its sprite
+    __slots__ = ()
 
-    def draw(self, animation = "idle"):
+    def draw(self, clips, animation):
+        u, v = clips.frame(self.CLIPS[animation], self.ANIM_PHASE)
         pyxel.blt(
             x = self.X,
             y = self.Y,
             img = self.IMG,
-            u = self.ANIM_SPRITES[animation][self.ANIM_TICK][0],
-            v = self.ANIM_SPRITES[animation][self.ANIM_TICK][1],
+            u = u,
+            v = v,
             w = self.WIDTH,
             h = self.HEIGHT,
             colkey = 0
@@ -65,40 +37,6 @@ class Hero:
 
 
 
-# Create characters
-Hero_01 = Hero(0, 0, 0, 0)
-Hero_02 = Hero(0, 0, 1, 1)
-Hero_03 = Hero(0, 0, 2, 2)
-Hero_04 = Hero(0, 0, 3, 3)
-Heroes = [Hero_01, Hero_02, Hero_03, Hero_04]
-
-
-
-class Camera:
-    # Camera bounds
-    MIN_X = SCREEN_WIDTH * TILE_SIZE / 2
-    MAX_X = (Dungeon.WIDTH * TILE_SIZE) - MIN_X
-
-    # Camera position
-    X = 0
-    Y = 0
-
-    # Move camera with the player
-    def follow(hero_x):
-        hero_center = hero_x + (Hero_01.WIDTH / 2)
-        half_screen_px = SCREEN_WIDTH * TILE_SIZE / 2
-
-        # Follow the hero inside camera bounds
-        if hero_center < Camera.MIN_X:
-            Camera.X = 0
-        elif hero_center > Camera.MAX_X:
-            Camera.X = Camera.MAX_X - half_screen_px
-        else:
-            Camera.X = hero_center - half_screen_px
-        pyxel.camera(Camera.X, Camera.Y)
-
-
-
 class App:
     def __init__(self):
         pyxel.init(
@@ -107,82 +45,62 @@ class App:
             title = "Mwahahahahah"
         )
 
-        # Import resources
-        pyxel.load("resources.pyxres")
+        # Import resources: tiles, heroes and the authored dungeon chunks
+        # (tilemap 1 is the chunks cache)
+        assets.load(pyxel, "resources.pyxres", images = (0, 1), tilemaps = (0,))
+
+        # Stream the dungeon chunks, built from the authored ones
+        self.dungeon = ChunkedDungeon(
+            chunks = CHUNKS,
+            chunk_width = Dungeon.CHUNK_WIDTH,
+            height = Dungeon.HEIGHT,
+            tile_size = TILE_SIZE,
+            cache_tm = Dungeon.CACHE_TM,
+            load_chunk = authored_chunks(
+                source_tm = Dungeon.SOURCE_TM,
+                source_chunks = Dungeon.SOURCE_CHUNKS,
+                chunk_width = Dungeon.CHUNK_WIDTH,
+                height = Dungeon.HEIGHT
+            )
+        )
 
-        # Init values
-        self.ANIMATION_TICK = 0
-        self.ANIMATION_DELAY = ANIMATION_DELAY
-        self.ANIMATION_TYPE = "idle"
+        # Party, camera and animations (no pyxel in there)
+        self.game = new_game(hero_class = Hero, chunks = CHUNKS)
 
-        # Run game
-        pyxel.run(self.update, self.draw)
+        # Run game at a fixed tick rate, heroes and camera drawn between ticks
+        self.loop = FixedTimestep(pyxel, self.update, self.draw)
+        for hero in self.game.heroes:
+            self.loop.interpolate(hero, 'X')
+        self.loop.interpolate(self.game.camera, 'X')
+        self.loop.run()
 
     def update(self):
-        # Animate
-        self.ANIMATION_DELAY -= 1
-        if self.ANIMATION_DELAY < 0 : # +1 tick when delay is over
-            
-            self.ANIMATION_TICK += 1
-            if self.ANIMATION_TICK > 1 : # If tick > 2, loop animation
-                self.ANIMATION_TICK = 0
-            self.ANIMATION_DELAY = ANIMATION_DELAY # Reset countdown
-
-            # Animate heroes
-            for hero in Heroes:
-                hero.ANIM_TICK = self.ANIMATION_TICK
-
-        # Move the characters left or right
-        if pyxel.btn(pyxel.KEY_RIGHT):
-            # Animate walk
-            self.ANIMATION_TYPE = "walk"
-
-            # Move only if not at the end of the map
-            next_step = Hero_01.X + Hero_01.WIDTH + Hero_01.SPEED
-            dungeon_end = Dungeon.WIDTH * TILE_SIZE - Hero_01.SPEED
-            if next_step < dungeon_end:
-                # Move heroes
-                for hero in Heroes:
-                    hero.X += hero.SPEED
-        
-        elif pyxel.btn(pyxel.KEY_LEFT):
-            # Animate walk
-            self.ANIMATION_TYPE = "walk"
-
-            # Move only if not at the end of the map
-            previous_step = Hero_04.X - Hero_04.SPEED
-            dungeon_start = 0 + Hero_04.SPEED
-            if previous_step > dungeon_start:
-                # Move heroes
-                for hero in Heroes:
-                    hero.X -= hero.SPEED
-        
-        else:
-            # Animate idle
-            self.ANIMATION_TYPE = "idle"
-    
-        # Position camera
-        Camera.follow(Hero_01.X)
+        # Move the party left or right
+        self.game.update(
+            left = pyxel.btn(pyxel.KEY_LEFT),
+            right = pyxel.btn(pyxel.KEY_RIGHT)
+        )
+
+        # Load the chunks around the camera before they are drawn
+        camera = self.game.camera
+        self.dungeon.prefetch(camera.X, camera.X + SCREEN_WIDTH * TILE_SIZE)
 
     def draw(self):
+        game = self.game
+        camera = game.camera
+
         # Draw background
         pyxel.cls(0)
+        pyxel.camera(camera.X, camera.Y)
 
-        # Draw tilemap
-        pyxel.bltm(
-            x = 0,
-            y = 0,
-            tm = 0,
-            u = 0,
-            v = 0,
-            w = Dungeon.WIDTH * TILE_SIZE,
-            h = Dungeon.HEIGHT * TILE_SIZE,
-            colkey = 14
-        )
+        # Draw the tilemap columns seen by the camera only
+        first_column, last_column = camera.visible_columns()
+        self.dungeon.draw(first_column, last_column, colkey = 14)
 
-        # Draw character
-        for hero in Heroes:
-            hero.draw(self.ANIMATION_TYPE)
+        # Draw characters inside the screen
+        for hero in game.heroes:
+            if camera.is_visible(hero.X, hero.WIDTH):
+                hero.draw(game.clips, game.ANIMATION_TYPE)
 
         # Move the camera
         pyxel.camera()
@@ -192,4 +110,7 @@ class App:
         # Define characters and enemies battle position
         # Draw menu area (bottom of the screen)
 
-App()
\ No newline at end of file
+
+
+if __name__ == '__main__':
+    App()
@@ -0,0 +1,232 @@
+# ======================================================================
+# 2D DD - PARTY SIMULATION
+# ======================================================================
+# The party walking through the dungeon, without pyxel: heroes state,
+# formation, camera and animation clock. Nothing is built at import, so
+# tests, benchmarks and workers can make as many games as they need:
+#
+#   game = new_game()
+#   game.update(right = True)
+#   game.heroes[0].X
+#
+# game.py is the pyxel front-end: it reads the keyboard and draws. The
+# shared modules (common/) are imported from pyxel_tests/, which the
+# importer puts on the path: importing this changes no global state.
+
+from common.animation import AnimationClips, AnimationClock
+from common.entities import EntityStore, EntityView, Field
+from formation import Formation
+
+
+
+TILE_SIZE = 8
+CHARACTER_SIZE = 16
+
+SCREEN_HEIGHT = 16
+SCREEN_WIDTH = 16
+
+FLOOR = 8 * TILE_SIZE - CHARACTER_SIZE
+
+HERO_SPACING = 10
+HERO_SPEED = 2
+HEROES = 4
+
+ANIMATION_DELAY = 4
+
+# Animations
+IDLE = 0
+WALK = 1
+
+
+
+class Dungeon:
+    # Dungeon dimensions (tiles), made of chunks of one screen
+    HEIGHT = 16
+    CHUNK_WIDTH = 16
+
+    # Tilemaps: authored chunks, and cache of the chunks in memory
+    SOURCE_TM = 0
+    SOURCE_CHUNKS = 2
+    CACHE_TM = 1
+
+    # Chunks of the level: the authored ones by default, or a long level
+    # going on with random picks of them
+    CHUNKS = SOURCE_CHUNKS
+    LONG_CHUNKS = 256
+    WIDTH = CHUNK_WIDTH * CHUNKS
+
+
+
+class Hero(EntityView):
+    # View on a row of the party store, other attributes never change
+    __slots__ = ('IMG', 'U', 'V', 'WIDTH', 'HEIGHT', 'ORDER', 'SPRITES', 'CLIPS')
+
+    X = Field('X')
+    Y = Field('Y')
+    SPEED = Field('SPEED')
+    ANIM_PHASE = Field('ANIM_PHASE')
+
+    def __init__(self, store, clips, u, v, order, spritesheet):
+        # Position, movement and animation phase (all heroes in step)
+        super().__init__(
+            store,
+            X = 4 + 3 * HERO_SPACING - order * HERO_SPACING,
+            Y = FLOOR,
+            SPEED = HERO_SPEED,
+            ANIM_PHASE = 0
+        )
+        self.ORDER = order
+
+        # Sprites
+        self.IMG = 1
+        self.U = u
+        self.V = v
+        self.WIDTH = CHARACTER_SIZE
+        self.HEIGHT = CHARACTER_SIZE
+
+        # Animations: one clip per animation (IDLE, WALK), a frame lasts
+        # until the delay countdown is over
+        self.SPRITES = spritesheet * CHARACTER_SIZE
+        self.CLIPS = (
+            clips.add(
+                f"hero_{order}_idle",
+                [(u, v + self.SPRITES),
+                 (u + CHARACTER_SIZE, v + self.SPRITES)],
+                delay = ANIMATION_DELAY + 1
+            ),
+            clips.add(
+                f"hero_{order}_walk",
+                [(u, v + self.SPRITES),
+                 (u + CHARACTER_SIZE * 2, v + self.SPRITES)],
+                delay = ANIMATION_DELAY + 1
+            )
+        )
+
+
+
+class Camera:
+    def __init__(self, width = Dungeon.WIDTH):
+        # Dungeon width (tiles)
+        self.width = width
+
+        # Camera bounds
+        self.MIN_X = SCREEN_WIDTH * TILE_SIZE / 2
+        self.MAX_X = (width * TILE_SIZE) - self.MIN_X
+
+        # Camera position
+        self.X = 0
+        self.Y = 0
+
+    # Move camera with the player
+    def follow(self, hero_x, hero_width):
+        hero_center = hero_x + (hero_width / 2)
+        half_screen_px = SCREEN_WIDTH * TILE_SIZE / 2
+
+        # Follow the hero inside camera bounds
+        if hero_center < self.MIN_X:
+            self.X = 0
+        elif hero_center > self.MAX_X:
+            self.X = self.MAX_X - half_screen_px
+        else:
+            self.X = hero_center - half_screen_px
+
+    # Tile columns seen by the camera, with a one tile margin
+    def visible_columns(self):
+        first = int(self.X // TILE_SIZE) - 1
+        last = int((self.X + SCREEN_WIDTH * TILE_SIZE) // TILE_SIZE) + 1
+        return max(first, 0), min(last, self.width)
+
+    # Is a sprite between x and x + width inside the screen?
+    def is_visible(self, x, width):
+        return x + width > self.X and x < self.X + SCREEN_WIDTH * TILE_SIZE
+
+
+
+class PartyGame:
+    def __init__(self, hero_class = Hero, chunks = Dungeon.CHUNKS):
+
+        # Dungeon width (tiles)
+        self.width = chunks * Dungeon.CHUNK_WIDTH
+
+        # Animation clock shared by every sprite of this game, and the
+        # compiled clips
+        self.clock = AnimationClock()
+        self.clips = AnimationClips(self.clock)
+
+        # Heroes state, one array per field, moved all at once
+        self.party = EntityStore(
+            capacity = HEROES,
+            fields = {'X': 'f8', 'Y': 'f8', 'SPEED': 'f8', 'ANIM_PHASE': 'i4'}
+        )
+        self.heroes = [
+            hero_class(self.party, self.clips, 0, 0, order, order)
+            for order in range(HEROES)
+        ]
+        self.leader = self.heroes[0]
+
+        # The other heroes follow the first one in its footsteps
+        self.formation = Formation(
+            store = self.party,
+            leader = self.leader.row,
+            followers = [hero.row for hero in self.heroes[1:]],
+            step = HERO_SPEED
+        )
+
+        self.camera = Camera(self.width)
+
+        # Init values
+        self.ANIMATION_TYPE = IDLE
+
+    def update(self, left = False, right = False):
+        # Animate (every sprite follows the shared clock)
+        self.clock.advance()
+
+        # Leader state, read once from the party arrays (a view access
+        # costs more than the move)
+        party = self.party
+        row = self.leader.row
+        x = party.X.item(row)
+        speed = party.SPEED.item(row)
+        width = self.leader.WIDTH
+
+        # Move the characters left or right
+        if right:
+            # Animate walk
+            self.ANIMATION_TYPE = WALK
+
+            # Move only if not at the end of the map
+            next_step = x + width + speed
+            dungeon_end = self.width * TILE_SIZE - speed
+            if next_step < dungeon_end:
+                # Move the leader, the party follows
+                x += speed
+                party.X[row] = x
+                self.formation.advance()
+
+        elif left:
+            # Animate walk
+            self.ANIMATION_TYPE = WALK
+
+            # Move only if not at the start of the map: bounded on the
+            # leftmost hero, the rear one until the party turns around
+            previous_step = min(x, self.formation.min_x()) - speed
+            dungeon_start = 0 + speed
+            if previous_step > dungeon_start:
+                # Move the leader, the party follows
+                x -= speed
+                party.X[row] = x
+                self.formation.advance()
+
+        else:
+            # Animate idle
+            self.ANIMATION_TYPE = IDLE
+
+        # Position camera
+        self.camera.follow(x, width)
+
+
+
+def new_game(hero_class = Hero, chunks = Dungeon.CHUNKS):
+    # Fresh game state (hero_class: a front-end Hero subclass, e.g. with
+    # a draw method, chunks: Dungeon.LONG_CHUNKS for the long level)
+    return PartyGame(hero_class, chunks)
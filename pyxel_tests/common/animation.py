@@ -0,0 +1,73 @@
+# ======================================================================
+# SPRITE ANIMATIONS
+# ======================================================================
+# Animation clips are compiled once into flat tables of sprite positions,
+# with one entry per tick, and played by a clock shared by every sprite.
+#
+# A sprite only holds a clip id and a phase offset: there is nothing to
+# advance per sprite in update, and draw reads its (u, v) with a couple of
+# list lookups.
+#
+#   clock = AnimationClock()
+#   clips = AnimationClips(clock)
+#   WALK = clips.add("duck_walk", [(24, 0), (16, 0), (32, 0), (16, 0)], delay = 4)
+#
+#   update: clock.advance()
+#   draw:   u, v = clips.frame(WALK, phase)
+
+
+
+class AnimationClock:
+    # Ticks since the start of the game, advanced once per update
+    def __init__(self):
+        self.time = 0
+
+
+    def advance(self, ticks = 1):
+        self.time += ticks
+
+
+
+class AnimationClips:
+    def __init__(self, clock):
+        self.clock = clock
+
+        # Sprite positions of every clip, one entry per tick
+        self.u = []
+        self.v = []
+
+        # Clip id -> first entry and number of entries in u / v
+        self.start = []
+        self.length = []
+
+        # Clip name -> clip id
+        self.ids = {}
+
+
+    def add(self, name, frames, delay):
+        # Compile a clip: frames are (u, v) sprite positions, each one shown
+        # for delay ticks
+        if not frames:
+            raise ValueError(f"Animation {name} has no frames")
+        if delay < 1:
+            raise ValueError(f"Animation {name}: delay must be at least one tick, got {delay}")
+
+        clip = len(self.start)
+        self.start.append(len(self.u))
+        self.length.append(len(frames) * delay)
+        for u, v in frames:
+            self.u.extend([u] * delay)
+            self.v.extend([v] * delay)
+
+        self.ids[name] = clip
+        return clip
+
+
+    def clip(self, name):
+        return self.ids[name]
+
+
+    def frame(self, clip, phase = 0):
+        # Sprite position of a clip at the current time
+        index = self.start[clip] + (self.clock.time + phase) % self.length[clip]
+        return self.u[index], self.v[index]
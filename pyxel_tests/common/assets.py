@@ -0,0 +1,269 @@
+# ======================================================================
+# ASSET BUNDLES
+# ======================================================================
+# pyxel.load() unzips and parses the whole .pyxres (a TOML file of pixel
+# rows) at every launch. This builds, once, an uncompressed bundle of the
+# decoded banks next to an index, and loads banks from it by copying raw
+# bytes straight into pyxel's image / tilemap memory:
+# - bundles are cached by the hash of their .pyxres and the bundle format
+#   VERSION, so a changed file (or format) is built again and games with
+#   the same file share one bundle
+# - bundles are memory-mapped, only the pages of the banks a scene asks
+#   for are read, and several games (or processes) share them
+# - sounds and musics are still loaded by pyxel, only when the file has
+#   some
+#
+# Usage in a game (banks not listed are not loaded):
+#   assets.load(pyxel, "resources.pyxres", images = (0, 1), tilemaps = (0,))
+#
+# Build ahead of time (from pyxel_tests/), otherwise the first load does:
+#   python -m common.assets build */*.pyxres
+#
+# Bundle: raw banks one after the other, images 1 byte per pixel, tilemaps
+# 2 little endian u16 per tile (tile x, tile y), like pyxel's own memory.
+# Index (JSON): offset and size of every bank, tilemaps image source.
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import tomllib
+import zipfile
+from array import array
+
+
+
+# Bundles and indexes, by hash of their .pyxres and format version
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.asset_cache')
+
+RESOURCE_FILE = 'pyxel_resource.toml'
+VERSION = 1
+
+# Bundles mapped by this process, by hash
+BUNDLES = {}
+
+
+
+def resource_path(filename):
+    # Like pyxel, relative paths start from the running script directory
+    if os.path.isabs(filename):
+        return filename
+
+    main = sys.modules.get('__main__')
+    main_file = getattr(main, '__file__', None)
+    if main_file:
+        return os.path.join(os.path.dirname(os.path.abspath(main_file)), filename)
+    return filename
+
+
+def source_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def bundle_paths(digest, cache_dir = CACHE_DIR):
+    name = os.path.join(cache_dir, f"{digest[:32]}_v{VERSION}")
+    return name + '.bundle', name + '.json'
+
+
+
+# ======================================================================
+# BUILD
+# ======================================================================
+
+def build(source, cache_dir = CACHE_DIR):
+    # Decode a .pyxres into a bundle + index, return the hash (built
+    # again if either file is missing)
+    digest = source_hash(source)
+    bundle_path, index_path = bundle_paths(digest, cache_dir)
+    if os.path.exists(index_path) and os.path.exists(bundle_path):
+        return digest
+
+    with zipfile.ZipFile(source) as archive:
+        resource = tomllib.loads(archive.read(RESOURCE_FILE).decode())
+
+    index = {
+        'version': VERSION,
+        'source': os.path.basename(source),
+        'sha256': digest,
+        'images': [],
+        'tilemaps': [],
+        'audio': has_audio(resource)
+    }
+
+    os.makedirs(cache_dir, exist_ok = True)
+    offset = 0
+
+    # Write in temporary files, then rename: a game starting meanwhile
+    # never maps half a bundle
+    with open(bundle_path + '.tmp', 'wb') as f:
+
+        # Images: one byte (color) per pixel, rows may be cut short
+        for data in resource.get('images', []):
+            width, height = data['width'], data['height']
+            pixels = bytearray(width * height)
+            for y, row in enumerate(data['data'][:height]):
+                row = row[:width]
+                pixels[y * width:y * width + len(row)] = bytes(row)
+
+            f.write(pixels)
+            index['images'].append({'offset': offset, 'width': width, 'height': height})
+            offset += len(pixels)
+
+        # Tilemaps: (tile x, tile y) u16 pairs, rows may be cut short
+        for data in resource.get('tilemaps', []):
+            width, height = data['width'], data['height']
+            tiles = array('H', bytes(width * height * 4))
+            for y, row in enumerate(data['data'][:height]):
+                row = row[:width * 2]
+                tiles[y * width * 2:y * width * 2 + len(row)] = array('H', row)
+            if sys.byteorder != 'little':
+                tiles.byteswap()
+
+            f.write(tiles.tobytes())
+            index['tilemaps'].append({
+                'offset': offset,
+                'width': width,
+                'height': height,
+                'imgsrc': data.get('imgsrc', 0)
+            })
+            offset += len(tiles) * tiles.itemsize
+
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump(index, f, indent = 2)
+
+    os.replace(bundle_path + '.tmp', bundle_path)
+    os.replace(index_path + '.tmp', index_path)
+    return digest
+
+
+def has_audio(resource):
+    # Resources always list the sound and music slots, most are empty
+    sounds = any(sound.get('notes') for sound in resource.get('sounds', []))
+    musics = any(any(music.get('seqs', [])) for music in resource.get('musics', []))
+    return sounds or musics
+
+
+
+# ======================================================================
+# LOAD
+# ======================================================================
+
+class Bundle:
+    def __init__(self, digest, cache_dir = CACHE_DIR):
+        bundle_path, index_path = bundle_paths(digest, cache_dir)
+        with open(index_path) as f:
+            self.index = json.load(f)
+        if self.index.get('version') != VERSION:
+            raise ValueError(f"{index_path} is not a version {VERSION} bundle index")
+
+        # Map the bundle read-only (an empty bundle cannot be mapped)
+        with open(bundle_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self.map = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) if size else b''
+        self.data = memoryview(self.map)
+
+
+    def bank(self, entry, item_size):
+        size = entry['width'] * entry['height'] * item_size
+        return self.data[entry['offset']:entry['offset'] + size]
+
+
+    def load_image(self, number, image):
+        entry = self.index['images'][number]
+        copy_rows(self.bank(entry, 1), entry['width'], entry['height'], image, 1)
+
+
+    def load_tilemap(self, number, tilemap):
+        entry = self.index['tilemaps'][number]
+        copy_rows(self.bank(entry, 4), entry['width'], entry['height'], tilemap, 4)
+        tilemap.imgsrc = entry['imgsrc']
+
+
+
+def copy_rows(source, width, height, target, item_size):
+    # Copy a bank into pyxel memory, row by row if the sizes differ
+    if not hasattr(target, 'data_ptr'):
+        return copy_items(source, width, height, target, item_size)
+
+    memory = memoryview(target.data_ptr()).cast('B')
+    if target.width == width:
+        size = min(len(memory), len(source))
+        memory[:size] = source[:size]
+        return
+
+    memory[:] = bytes(len(memory))
+    row = min(width, target.width) * item_size
+    for y in range(min(height, target.height)):
+        start = y * target.width * item_size
+        memory[start:start + row] = source[y * width * item_size:y * width * item_size + row]
+
+
+def copy_items(source, width, height, target, item_size):
+    # Images without raw memory: pset what is not 0
+    if item_size == 1:
+        target.cls(0)
+        for i, col in enumerate(source):
+            if col:
+                target.pset(i % width, i // width, col)
+    else:
+        target.cls((0, 0))
+        tiles = source.cast('H')
+        for i in range(width * height):
+            tile = (tiles[i * 2], tiles[i * 2 + 1])
+            if tile != (0, 0):
+                target.pset(i % width, i // width, tile)
+
+
+def open_bundle(path, cache_dir = CACHE_DIR):
+    # Bundle of a .pyxres, built if the file is new or changed
+    digest = source_hash(path)
+    bundle = BUNDLES.get(digest)
+    if bundle is None:
+        build(path, cache_dir)
+        bundle = BUNDLES[digest] = Bundle(digest, cache_dir)
+    return bundle
+
+
+def load(pyxel, filename, images = None, tilemaps = None):
+    # Load the listed banks of a .pyxres (all of them if None)
+    path = resource_path(filename)
+    bundle = open_bundle(path)
+
+    if images is None:
+        images = range(len(bundle.index['images']))
+    for number in images:
+        bundle.load_image(number, pyxel.images[number])
+
+    if tilemaps is None:
+        tilemaps = range(len(bundle.index['tilemaps']))
+    for number in tilemaps:
+        bundle.load_tilemap(number, pyxel.tilemaps[number])
+
+    if bundle.index['audio']:
+        pyxel.load(path, exclude_images = True, exclude_tilemaps = True)
+
+    return bundle
+
+
+
+# ======================================================================
+# COMMAND LINE
+# ======================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description = "Build pre-decoded bundles of .pyxres files")
+    parser.add_argument('mode', choices = ['build'])
+    parser.add_argument('files', nargs = '+', help = ".pyxres files")
+    parser.add_argument('--cache-dir', default = CACHE_DIR)
+    args = parser.parse_args()
+
+    for source in args.files:
+        digest = build(source, args.cache_dir)
+        print(f"{source} -> {bundle_paths(digest, args.cache_dir)[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+# ======================================================================
+# HEADLESS BENCHMARKS
+# ======================================================================
+# Runs every game's App on the stub pyxel with scripted input for a fixed
+# number of frames, and times each update and draw call.
+#
+# A first pass measures time, a second pass measures the memory of each
+# frame, so tracing does not skew the timings:
+# - blocks: memory blocks allocated by the frame and still allocated at its
+#   end (sys.getallocatedblocks delta). Objects allocated and freed within
+#   the frame cancel out, so a steady game shows about 0 even when it makes
+#   many temporary objects
+# - peak: the most bytes live at once during the frame above what was live
+#   when it started (tracemalloc), which shows the size of those temporary
+#   objects, not how many there were
+#
+# Usage (from pyxel_tests/):
+#   python -m common.bench
+#   python -m common.bench --frames 5000 --save bench_baseline.json
+#   python -m common.bench --compare bench_baseline.json
+#   python -m common.bench --games the_little_duck --replay duck.rep
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+
+from common import replay
+from common import stub_pyxel
+
+
+
+# Games to benchmark: script and keys pressed by the scripted input
+GAMES = {
+    'fishing_01': ('fishing_01/game.py', ('KEY_SPACE', 'KEY_1', 'KEY_2')),
+    'fishing_02': ('fishing_02/iteration_03.py', ('KEY_SPACE', 'KEY_BACKSPACE')),
+    '2d_dd': ('2d_dd/game.py', ('KEY_LEFT', 'KEY_RIGHT')),
+    'the_little_duck': ('the_little_duck/game.py', ('KEY_UP', 'KEY_DOWN', 'KEY_LEFT', 'KEY_RIGHT'))
+}
+
+# Default run
+FRAMES = 3000
+WARMUP = 30
+SEED = 0
+
+# Slower than the baseline by more than this ratio = regression
+TOLERANCE = 1.2
+
+
+
+def scripted_input(keys, frames, seed):
+    # Random key holds: each key flips between pressed and released now
+    # and then, so the games see both long presses and taps
+    rng = random.Random(seed)
+    codes = [getattr(stub_pyxel, name) for name in replay.KEYS]
+    bits = [replay.KEYS.index(name) for name in keys]
+
+    frames_data = array('I')
+    held = 0
+    for _ in range(frames):
+        previous = held
+        for bit in bits:
+            if rng.random() < 0.08:
+                held ^= 1 << bit
+        pressed = held & ~previous
+        frames_data.append(held | pressed << replay.BTNP_SHIFT)
+
+    return replay.Recording(seed, codes, frames_data)
+
+
+
+class FrameTimer:
+    # Times update and draw of every frame into preallocated arrays
+
+    def __init__(self, frames, trace_memory = False):
+        self.frames = frames
+        self.trace_memory = trace_memory
+        self.update_time = array('d', bytes(8 * frames))
+        self.draw_time = array('d', bytes(8 * frames))
+        self.blocks = array('d', bytes(8 * frames))
+        self.peak = array('d', bytes(8 * frames))
+        self.frame = 0
+        self.start_blocks = 0
+        self.start_memory = 0
+
+
+    def install(self, pyxel):
+        run = pyxel.run
+
+        def timed_run(update, draw):
+            def timed_update():
+                if self.trace_memory:
+                    tracemalloc.reset_peak()
+                    self.start_memory = tracemalloc.get_traced_memory()[0]
+                    self.start_blocks = sys.getallocatedblocks()
+
+                start = time.perf_counter()
+                update()
+                self.update_time[self.frame] = time.perf_counter() - start
+
+            def timed_draw():
+                start = time.perf_counter()
+                draw()
+                self.draw_time[self.frame] = time.perf_counter() - start
+
+                if self.trace_memory:
+                    self.blocks[self.frame] = sys.getallocatedblocks() - self.start_blocks
+                    peak = tracemalloc.get_traced_memory()[1]
+                    self.peak[self.frame] = peak - self.start_memory
+
+                self.frame += 1
+
+            run(timed_update, timed_draw)
+
+        pyxel.run = timed_run
+
+
+
+def run_game(script, recording, frames, trace_memory = False):
+    # Fresh stub for every run: frame count, banks and hooks are reset
+    pyxel = importlib.reload(stub_pyxel)
+    sys.modules['pyxel'] = pyxel
+    pyxel.max_frames = frames
+
+    timer = FrameTimer(frames, trace_memory)
+    timer.install(pyxel)
+    replay.install_player(pyxel, recording)
+
+    # Games print some events, keep them out of the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            replay.run_script(script)
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+
+    return timer
+
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def stats(values):
+    return {
+        'mean_us': sum(values) / len(values) * 1e6,
+        'p95_us': percentile(values, 95) * 1e6,
+        'p99_us': percentile(values, 99) * 1e6
+    }
+
+
+def benchmark(name, frames = FRAMES, warmup = WARMUP, seed = SEED, recording = None):
+    script, keys = GAMES[name]
+    total = frames + warmup
+    if recording is None:
+        recording = scripted_input(keys, total + 1, seed)
+
+    # Pass 1: timings
+    timer = run_game(script, recording, total)
+    count = timer.frame
+    update_time = timer.update_time[warmup:count]
+    draw_time = timer.draw_time[warmup:count]
+
+    # Pass 2: memory
+    memory = run_game(script, recording, total, trace_memory = True)
+    blocks = memory.blocks[warmup:memory.frame]
+    peak = memory.peak[warmup:memory.frame]
+
+    return {
+        'frames': len(update_time),
+        'update': stats(update_time),
+        'draw': stats(draw_time),
+        'frame': stats([u + d for u, d in zip(update_time, draw_time)]),
+        'blocks_per_frame': sum(blocks) / max(len(blocks), 1),
+        'peak_bytes_per_frame': sum(peak) / max(len(peak), 1)
+    }
+
+
+
+def print_report(results, baseline = None):
+    print(
+        f"{'game':<16} {'frames':>6} "
+        f"{'update mean':>11} {'p95':>7} {'p99':>7} "
+        f"{'draw mean':>9} {'p95':>7} {'p99':>7} {'blocks/frame':>12} {'peak/frame':>11}"
+    )
+    for name, r in results.items():
+        line = (
+            f"{name:<16} {r['frames']:>6} "
+            f"{r['update']['mean_us']:>9.1f}us {r['update']['p95_us']:>7.1f} {r['update']['p99_us']:>7.1f} "
+            f"{r['draw']['mean_us']:>7.1f}us {r['draw']['p95_us']:>7.1f} {r['draw']['p99_us']:>7.1f} "
+            f"{r['blocks_per_frame']:>12.2f} {r['peak_bytes_per_frame']:>10.0f}B"
+        )
+        if baseline and name in baseline:
+            ratio = r['frame']['mean_us'] / baseline[name]['frame']['mean_us']
+            line += f"  x{ratio:.2f} vs baseline"
+        print(line)
+
+
+def regressions(results, baseline, tolerance = TOLERANCE):
+    # Games slower than the baseline on mean update/draw time (tail
+    # percentiles of a few microseconds are too noisy to gate on)
+    slower = []
+    for name, r in results.items():
+        if name not in baseline:
+            continue
+        for part in ('update', 'draw'):
+            reference = baseline[name][part]['mean_us']
+            if reference > 0 and r[part]['mean_us'] > reference * tolerance:
+                slower.append(f"{name} {part} mean: {reference:.1f}us -> {r[part]['mean_us']:.1f}us")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Headless update/draw benchmarks of the games")
+    parser.add_argument('--games', nargs = '+', default = list(GAMES), choices = list(GAMES))
+    parser.add_argument('--frames', type = int, default = FRAMES)
+    parser.add_argument('--warmup', type = int, default = WARMUP)
+    parser.add_argument('--seed', type = int, default = SEED)
+    parser.add_argument('--replay', help = "use a recorded session as input (single game)")
+    parser.add_argument('--save', help = "write the results as a JSON baseline")
+    parser.add_argument('--compare', help = "compare with a JSON baseline, exit 1 on regression")
+    parser.add_argument('--tolerance', type = float, default = TOLERANCE)
+    args = parser.parse_args()
+
+    recording = replay.Recording.load(args.replay) if args.replay else None
+
+    results = {}
+    for name in args.games:
+        results[name] = benchmark(name, args.frames, args.warmup, args.seed, recording)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+    print_report(results, baseline)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'frames': args.frames, 'seed': args.seed, 'results': results}, f, indent = 2)
+
+    if baseline:
+        slower = regressions(results, baseline, args.tolerance)
+        for line in slower:
+            print(f"REGRESSION {line}")
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
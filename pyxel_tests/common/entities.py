@@ -0,0 +1,118 @@
+# ======================================================================
+# ENTITY STORE
+# ======================================================================
+# Entity state kept as a structure of arrays: one NumPy array per field
+# (position, speed, animation phase...), one row per entity. Systems
+# update every entity at once on the arrays, e.g.
+#
+#   party.X[party.live()] += party.SPEED[party.live()]
+#
+# and entities are thin __slots__ views (store + row) for the code that
+# works on one entity at a time:
+#
+#   class Hero(EntityView):
+#       __slots__ = ('WIDTH',)
+#       X = Field('X')
+#
+#   party = EntityStore(capacity = 4, fields = {'X': 'f8'})
+#   hero = Hero(party, X = 34)
+#   hero.X += 2
+
+import numpy as np
+
+
+
+class EntityStore:
+    def __init__(self, capacity, fields):
+
+        # Field name -> NumPy dtype
+        self.fields = dict(fields)
+
+        # One array per field, also reachable as store.<field>
+        self.capacity = capacity
+        for name, dtype in self.fields.items():
+            setattr(self, name, np.zeros(capacity, dtype = dtype))
+        self.alive = np.zeros(capacity, dtype = bool)
+
+        # Rows in use are below size, freed rows are reused first
+        self.size = 0
+        self.free_rows = []
+
+
+    def spawn(self, **values):
+        # New entity row, fields not given are 0
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            if self.size == self.capacity:
+                self.grow(self.capacity * 2)
+            row = self.size
+            self.size += 1
+
+        for name, value in values.items():
+            if name not in self.fields:
+                raise KeyError(f"Unknown entity field {name}")
+            getattr(self, name)[row] = value
+        self.alive[row] = True
+        return row
+
+
+    def despawn(self, row):
+        # Reset the row so bulk updates leave it alone
+        for name in self.fields:
+            getattr(self, name)[row] = 0
+        self.alive[row] = False
+        self.free_rows.append(row)
+
+
+    def grow(self, capacity):
+        # Bigger arrays, rows (and views on them) are kept
+        for name in self.fields:
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype = array.dtype)
+            grown[:self.capacity] = array
+            setattr(self, name, grown)
+
+        alive = np.zeros(capacity, dtype = bool)
+        alive[:self.capacity] = self.alive
+        self.alive = alive
+        self.capacity = capacity
+
+
+    def live(self):
+        # Rows to update in bulk: every row in use (freed rows are zeros)
+        return slice(0, self.size)
+
+
+
+class Field:
+    # Attribute of an entity view, read / written in the store array. Reads
+    # give Python numbers (not NumPy scalars, slow to compute with). A
+    # view access costs much more than a plain attribute: code moving many
+    # entities works on the store arrays instead
+
+    def __init__(self, name):
+        self.name = name
+
+
+    def __get__(self, view, owner = None):
+        if view is None:
+            return self
+        return getattr(view.store, self.name).item(view.row)
+
+
+    def __set__(self, view, value):
+        getattr(view.store, self.name)[view.row] = value
+
+
+
+class EntityView:
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, **values):
+        self.store = store
+        self.row = store.spawn(**values)
+
+
+    def despawn(self):
+        self.store.despawn(self.row)
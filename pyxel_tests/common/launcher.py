@@ -0,0 +1,406 @@
+# ======================================================================
+# GAME LAUNCHER
+# ======================================================================
+# Runs every game in one pyxel window and switches between them from a
+# menu, instead of one `pyxel run` (and one cold start) per game:
+# - game scripts are imported once, starting a game again only builds a
+#   new App. Each game directory keeps its own modules, so the `game.py`
+#   of two games (or their helper modules) never clash
+# - a game left for the menu is paused: its image and tilemap banks go
+#   in a cache and are copied back when it is resumed. The cache keeps
+#   the games left last (LRU), an evicted game starts again
+# - games run as scenes: their pyxel.init only sets the scene size (the
+#   scene is centered in the window), their pyxel.run hands update and
+#   draw over to the launcher, and pyxel.quit goes back to the menu
+#
+# Keys: UP / DOWN select, RETURN play, BACKSPACE restart, TAB back to
+# the menu, ESC quit.
+#
+# Usage (from pyxel_tests/):
+#   python -m common.launcher
+#   python -m common.launcher --cache 2
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from common import assets
+from common import loop
+
+
+
+# pyxel_tests/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Games: menu name and script
+SCENES = (
+    ('fishing_01', 'fishing_01/game.py'),
+    ('fishing_02 #1', 'fishing_02/iteration_01.py'),
+    ('fishing_02 #2', 'fishing_02/iteration_02.py'),
+    ('fishing_02 #3', 'fishing_02/iteration_03.py'),
+    ('2d_dd', '2d_dd/game.py'),
+    ('the_little_duck', 'the_little_duck/game.py')
+)
+
+# Window, the largest game screen
+WIDTH = 240
+HEIGHT = 160
+
+# Paused games kept in the banks cache
+CACHE = 3
+
+# Keys
+MENU_KEY = 'KEY_TAB'
+PLAY_KEY = 'KEY_RETURN'
+RESTART_KEY = 'KEY_BACKSPACE'
+
+# Menu
+COLOR_BG = 0
+COLOR_TEXT = 7
+COLOR_SELECTED = 10
+COLOR_INFO = 5
+
+
+
+class BankCache:
+    # Banks of the paused games, by game: the game left first is dropped
+    # when the cache is full
+
+    def __init__(self, capacity = CACHE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+
+    def __contains__(self, name):
+        return name in self.entries
+
+
+    def put(self, name, banks):
+        # Store the banks of a game, return the games dropped for them
+        self.entries[name] = banks
+        self.entries.move_to_end(name)
+
+        dropped = []
+        while len(self.entries) > self.capacity:
+            dropped.append(self.entries.popitem(last = False)[0])
+        return dropped
+
+
+    def take(self, name):
+        # Banks of a game being resumed (they are in pyxel again)
+        return self.entries.pop(name, None)
+
+
+    def discard(self, name):
+        self.entries.pop(name, None)
+
+
+
+def bank_memory(bank):
+    return memoryview(bank.data_ptr()).cast('B')
+
+
+def save_banks(pyxel):
+    # Copy of every image and tilemap bank, with the tilemaps image source
+    images = [bytes(bank_memory(pyxel.images[i])) for i in range(pyxel.NUM_IMAGES)]
+    tilemaps = [bytes(bank_memory(pyxel.tilemaps[i])) for i in range(pyxel.NUM_TILEMAPS)]
+    imgsrc = [pyxel.tilemaps[i].imgsrc for i in range(pyxel.NUM_TILEMAPS)]
+    return images, tilemaps, imgsrc
+
+
+def restore_banks(pyxel, banks):
+    images, tilemaps, imgsrc = banks
+    for i, data in enumerate(images):
+        bank_memory(pyxel.images[i])[:] = data
+    for i, data in enumerate(tilemaps):
+        bank_memory(pyxel.tilemaps[i])[:] = data
+        pyxel.tilemaps[i].imgsrc = imgsrc[i]
+
+
+def clear_banks(pyxel):
+    # Empty banks, like a fresh pyxel
+    for i in range(pyxel.NUM_IMAGES):
+        memory = bank_memory(pyxel.images[i])
+        memory[:] = bytes(len(memory))
+    for i in range(pyxel.NUM_TILEMAPS):
+        memory = bank_memory(pyxel.tilemaps[i])
+        memory[:] = bytes(len(memory))
+        pyxel.tilemaps[i].imgsrc = 0
+
+
+
+class Scene:
+    def __init__(self, name, script):
+        self.name = name
+        self.script = os.path.join(ROOT, script)
+        self.directory = os.path.dirname(self.script)
+
+        # Imported script, running App and the callbacks it gave pyxel.run
+        self.module = None
+        self.app = None
+        self.update = None
+        self.draw = None
+
+        # Size given to pyxel.init
+        self.width = WIDTH
+        self.height = HEIGHT
+
+        # Time the last start or resume took (seconds)
+        self.switch_time = None
+
+
+    def status(self, cache):
+        if self.app is not None and self.name in cache:
+            return "paused"
+        if self.module is not None:
+            return "loaded"
+        return ""
+
+
+
+class Launcher:
+    def __init__(self, pyxel, scenes = SCENES, cache = CACHE):
+        self.pyxel = pyxel
+        self.scenes = [Scene(name, script) for name, script in scenes]
+        self.cache = BankCache(cache)
+        self.selected = 0
+
+        # Running scene (None in the menu), scene whose App is being built
+        self.scene = None
+        self.building = None
+        self.quit_requested = False
+        self.offset_x = 0
+        self.offset_y = 0
+
+        # Modules of each game directory, out of sys.modules between imports
+        self.modules = {}
+
+        pyxel.init(width = WIDTH, height = HEIGHT, title = "pyxel_tests")
+        self.menu_key = getattr(pyxel, MENU_KEY)
+        self.play_key = getattr(pyxel, PLAY_KEY)
+        self.restart_key = getattr(pyxel, RESTART_KEY)
+        self.install()
+
+
+    # ==================================================================
+    # PYXEL HOOKS
+    # ==================================================================
+
+    def install(self):
+        # Games see a pyxel where init, run and quit act on their scene
+        pyxel = self.pyxel
+        self.run = pyxel.run
+        self.quit = pyxel.quit
+        self.load = pyxel.load
+        self.camera = pyxel.camera
+
+        pyxel.init = self.scene_init
+        pyxel.run = self.scene_run
+        pyxel.quit = self.scene_quit
+        pyxel.load = self.scene_load
+        pyxel.camera = self.scene_camera
+
+
+    def scene_init(self, width, height, **kwargs):
+        self.building.width = width
+        self.building.height = height
+
+
+    def scene_run(self, update, draw):
+        self.building.update = update
+        self.building.draw = draw
+
+
+    def scene_quit(self):
+        self.quit_requested = True
+
+
+    def scene_load(self, filename, *args, **kwargs):
+        # Relative to the game script, not to the launcher
+        self.load(assets.resource_path(filename), *args, **kwargs)
+
+
+    def scene_camera(self, x = 0, y = 0):
+        # Games draw at the scene offset
+        self.camera(x - self.offset_x, y - self.offset_y)
+
+
+    # ==================================================================
+    # SCENES
+    # ==================================================================
+
+    def import_script(self, scene):
+        # Import a game script once, its directory modules put back in
+        # sys.modules while it imports, and kept apart afterwards
+        directory = scene.directory
+        modules = self.modules.setdefault(directory, {})
+        sys.modules.update(modules)
+        sys.path.insert(0, directory)
+        before = set(sys.modules)
+
+        try:
+            name = 'scene_' + os.path.relpath(scene.script, ROOT)[:-3].replace(os.sep, '_')
+            spec = importlib.util.spec_from_file_location(name, scene.script)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        finally:
+            sys.path.remove(directory)
+            for name in set(sys.modules) - before:
+                path = getattr(sys.modules[name], '__file__', None) or ''
+                if path.startswith(directory + os.sep):
+                    modules[name] = sys.modules[name]
+            for name in modules:
+                sys.modules.pop(name, None)
+
+        return module
+
+
+    def start(self, scene):
+        # New App of the game, the script imported the first time only
+        clock = time.perf_counter()
+        if scene.module is None:
+            scene.module = self.import_script(scene)
+
+        clear_banks(self.pyxel)
+        self.cache.discard(scene.name)
+        self.quit_requested = False
+
+        # The App loads its resources next to the game script (__main__)
+        # and calls pyxel.init and pyxel.run, caught for the scene
+        main = sys.modules['__main__']
+        sys.modules['__main__'] = scene.module
+        self.building = scene
+        try:
+            scene.app = scene.module.App()
+        finally:
+            sys.modules['__main__'] = main
+            self.building = None
+
+        self.enter(scene)
+        scene.switch_time = time.perf_counter() - clock
+
+
+    def resume(self, scene):
+        clock = time.perf_counter()
+        restore_banks(self.pyxel, self.cache.take(scene.name))
+        self.quit_requested = False
+
+        # Time spent in the menu is not caught up
+        owner = getattr(scene.update, '__self__', None)
+        if isinstance(owner, loop.FixedTimestep):
+            owner.last_time = None
+
+        self.enter(scene)
+        scene.switch_time = time.perf_counter() - clock
+
+
+    def enter(self, scene):
+        self.scene = scene
+        self.offset_x = (WIDTH - scene.width) // 2
+        self.offset_y = (HEIGHT - scene.height) // 2
+
+
+    def leave(self):
+        # Pause the running scene, games dropped from the cache will start
+        # again
+        scene = self.scene
+        for name in self.cache.put(scene.name, save_banks(self.pyxel)):
+            for dropped in self.scenes:
+                if dropped.name == name:
+                    dropped.app = None
+
+        self.scene = None
+        self.offset_x = 0
+        self.offset_y = 0
+        self.camera()
+
+
+    # ==================================================================
+    # LOOP
+    # ==================================================================
+
+    def main_loop(self):
+        self.run(self.update, self.draw)
+
+
+    def update(self):
+        pyxel = self.pyxel
+        scene = self.scene
+
+        if scene is None:
+            self.update_menu()
+            return
+
+        scene.update()
+        if self.quit_requested or pyxel.btnp(self.menu_key):
+            self.leave()
+
+
+    def update_menu(self):
+        pyxel = self.pyxel
+        if pyxel.btnp(pyxel.KEY_UP):
+            self.selected = (self.selected - 1) % len(self.scenes)
+        if pyxel.btnp(pyxel.KEY_DOWN):
+            self.selected = (self.selected + 1) % len(self.scenes)
+
+        scene = self.scenes[self.selected]
+        if pyxel.btnp(self.play_key):
+            if scene.app is not None and scene.name in self.cache:
+                self.resume(scene)
+            else:
+                self.start(scene)
+        elif pyxel.btnp(self.restart_key):
+            self.start(scene)
+
+
+    def draw(self):
+        if self.scene is None:
+            self.draw_menu()
+            return
+
+        # Draw the scene at its offset, then hide what it drew around it
+        pyxel = self.pyxel
+        self.scene_camera()
+        self.scene.draw()
+
+        self.camera()
+        if self.offset_x > 0:
+            pyxel.rect(0, 0, self.offset_x, HEIGHT, COLOR_BG)
+            pyxel.rect(WIDTH - self.offset_x, 0, self.offset_x, HEIGHT, COLOR_BG)
+        if self.offset_y > 0:
+            pyxel.rect(0, 0, WIDTH, self.offset_y, COLOR_BG)
+            pyxel.rect(0, HEIGHT - self.offset_y, WIDTH, self.offset_y, COLOR_BG)
+
+
+    def draw_menu(self):
+        pyxel = self.pyxel
+        pyxel.cls(COLOR_BG)
+        pyxel.text(8, 8, "PYXEL TESTS", COLOR_TEXT)
+
+        for i, scene in enumerate(self.scenes):
+            y = 24 + i * 10
+            selected = i == self.selected
+            pyxel.text(8, y, ("> " if selected else "  ") + scene.name, COLOR_SELECTED if selected else COLOR_TEXT)
+            pyxel.text(120, y, scene.status(self.cache), COLOR_INFO)
+            if scene.switch_time is not None:
+                pyxel.text(170, y, f"{scene.switch_time * 1000:.1f}ms", COLOR_INFO)
+
+        pyxel.text(8, HEIGHT - 22, "RETURN play  BACKSPACE restart", COLOR_INFO)
+        pyxel.text(8, HEIGHT - 14, "TAB menu  ESC quit", COLOR_INFO)
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Play every game in one pyxel window")
+    parser.add_argument('--cache', type = int, default = CACHE, help = "paused games kept")
+    args = parser.parse_args()
+
+    import pyxel
+    Launcher(pyxel, cache = args.cache).main_loop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# ======================================================================
+# FIXED TIMESTEP LOOP
+# ======================================================================
+# Runs the game update at a fixed tick rate, whatever the time draw takes:
+# - each pyxel frame runs as many update ticks as the time elapsed since
+#   the last frame, so a slow frame is caught up by the next ones
+# - catching up is capped, a longer stall (window moved, debugger...)
+#   drops the late ticks instead of fast-forwarding the game
+# - registered positions are interpolated between the last two ticks for
+#   drawing, so movement stays smooth when frames and ticks do not line up
+#
+# Keys tapped during a frame (btnp) are only seen by its first tick, so a
+# catch-up tick does not press them twice.
+#
+# Record / replay and the benchmarks need the same ticks on every run:
+# they switch the loop to lockstep, one tick per frame and no interpolation.
+#
+#   self.loop = FixedTimestep(pyxel, self.update, self.draw)
+#   self.loop.interpolate(Player, 'X', 'Y')
+#   self.loop.run()
+
+import time
+from array import array
+
+
+
+# Default tick rate, pyxel's default frame rate (pyxel does not expose
+# the fps given to init, the stub does)
+FPS = 30
+
+# Ticks run in a single frame at most
+MAX_TICKS = 5
+
+# A frame arriving this fraction of a tick early still runs its tick
+# (frame timing jitters around the tick duration)
+SNAP = 0.25
+
+# One tick per frame, no interpolation
+LOCKSTEP = False
+
+
+
+def lockstep(enabled = True):
+    global LOCKSTEP
+    LOCKSTEP = enabled
+
+
+
+def no_press(key, hold = 0, repeat = 0):
+    return False
+
+
+
+class FixedTimestep:
+    def __init__(self, pyxel, update, draw, tick_rate = None, max_ticks = MAX_TICKS,
+                 clock = time.perf_counter):
+        self.pyxel = pyxel
+        self.update_tick = update
+        self.draw_frame = draw
+        self.clock = clock
+
+        # Tick duration (seconds), same as the frame rate by default
+        self.tick_rate = tick_rate or getattr(pyxel, 'fps', FPS)
+        self.dt = 1 / self.tick_rate
+        self.max_ticks = max_ticks
+
+        # Time not simulated yet, previous frame time
+        self.accumulator = 0.0
+        self.last_time = None
+
+        # Interpolation factor between the last two ticks
+        self.alpha = 1.0
+
+        # Interpolated attributes and their value at the previous tick
+        self.owners = []
+        self.attributes = []
+        self.previous = array('d')
+
+        # Stats
+        self.ticks = 0
+        self.frame_ticks = 0
+        self.dropped = 0
+
+
+    def interpolate(self, owner, *attributes):
+        # Draw owner.attribute between its previous and current tick value
+        for attribute in attributes:
+            self.owners.append(owner)
+            self.attributes.append(attribute)
+            self.previous.append(getattr(owner, attribute))
+
+
+    def run(self):
+        self.pyxel.run(self.update, self.draw)
+
+
+    # ==================================================================
+    # UPDATE
+    # ==================================================================
+
+    def tick(self):
+        # Keep the positions before the tick, then simulate it
+        for i in range(len(self.owners)):
+            self.previous[i] = getattr(self.owners[i], self.attributes[i])
+
+        self.update_tick()
+        self.ticks += 1
+
+
+    def update(self):
+        if LOCKSTEP:
+            self.tick()
+            self.frame_ticks = 1
+            self.alpha = 1.0
+            return
+
+        # Time elapsed since the last frame (one tick on the first frame)
+        now = self.clock()
+        if self.last_time is None:
+            self.accumulator = self.dt
+        else:
+            self.accumulator += now - self.last_time
+        self.last_time = now
+
+        # Run the ticks due, the catch-up ones without tapped keys
+        ticks = 0
+        btnp = self.pyxel.btnp
+        try:
+            while self.accumulator >= self.dt * (1 - SNAP) and ticks < self.max_ticks:
+                if ticks == 1:
+                    self.pyxel.btnp = no_press
+                self.tick()
+                self.accumulator -= self.dt
+                ticks += 1
+        finally:
+            self.pyxel.btnp = btnp
+
+        # Too late to catch up: drop the remaining ticks
+        if self.accumulator >= self.dt:
+            self.dropped += int(self.accumulator / self.dt)
+            self.accumulator %= self.dt
+
+        self.frame_ticks = ticks
+        self.alpha = min(max(self.accumulator / self.dt, 0.0), 1.0)
+
+
+    # ==================================================================
+    # DRAW
+    # ==================================================================
+
+    def draw(self):
+        if LOCKSTEP or self.alpha >= 1.0 or not self.owners:
+            self.draw_frame()
+            return
+
+        # Draw with the interpolated positions, then restore the tick ones
+        owners = self.owners
+        attributes = self.attributes
+        current = [getattr(owners[i], attributes[i]) for i in range(len(owners))]
+        alpha = self.alpha
+        for i in range(len(owners)):
+            previous = self.previous[i]
+            setattr(owners[i], attributes[i], previous + (current[i] - previous) * alpha)
+
+        try:
+            self.draw_frame()
+        finally:
+            for i in range(len(owners)):
+                setattr(owners[i], attributes[i], current[i])
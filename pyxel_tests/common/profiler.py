@@ -0,0 +1,253 @@
+# ======================================================================
+# FRAME PROFILER OVERLAY
+# ======================================================================
+# Times update, draw and a few registered subsystems of a game, and
+# draws a HUD on top of it (press F1 to show / hide):
+# - update + draw time of the last frame, and the update / draw split
+# - a sparkline of the last frames, against the frame budget
+# - the time spent in each subsystem
+#
+# Timings go in fixed-size ring buffers allocated once, so the profiler
+# does not grow or allocate containers while the game runs.
+#
+# Subsystems are dotted names looked up from the game script globals,
+# e.g. 'minigame.FishCursor.move', 'Hero.draw' or 'pyxel.bltm'.
+#
+# Usage (from pyxel_tests/):
+#   python -m common.profiler fishing_02/iteration_03.py
+#   python -m common.profiler 2d_dd/game.py --watch party.Camera.follow
+
+import argparse
+import os
+import sys
+import time
+from array import array
+
+from common.replay import run_script
+
+
+
+# Subsystems watched by default, per game script
+SUBSYSTEMS = {
+    'game.py': {
+        'fishing_01': ('Hook.move', 'FishingFrame.draw', 'Hook.draw'),
+        '2d_dd': ('party.Camera.follow', 'Hero.draw', 'pyxel.bltm'),
+        'the_little_duck': ('pyxel.bltm', 'pyxel.blt')
+    },
+    'iteration_03.py': {
+        'fishing_02': (
+            'minigame.FishCursor.move',
+            'minigame.Pattern.update',
+            'FishingMiniGame.draw'
+        )
+    }
+}
+
+# Frames kept in the ring buffers
+HISTORY = 240
+
+# Overlay
+TOGGLE_KEY = 'KEY_F1'
+SPARKLINE_HEIGHT = 16
+COLOR_BG = 0
+COLOR_TEXT = 7
+COLOR_OK = 11
+COLOR_OVER = 8
+COLOR_BUDGET = 5
+
+
+
+class Profiler:
+    def __init__(self, pyxel, history = HISTORY):
+        self.pyxel = pyxel
+        self.history = history
+        self.visible = False
+
+        # Ring buffers (seconds), index of the frame being written
+        self.update_time = array('d', bytes(8 * history))
+        self.draw_time = array('d', bytes(8 * history))
+        self.position = 0
+        self.frames = 0
+
+        # Subsystems: names, ring buffers, time accumulated this frame
+        self.names = []
+        self.subsystem_time = []
+        self.current = array('d')
+
+
+    # ==================================================================
+    # SUBSYSTEMS
+    # ==================================================================
+
+    def register(self, name, owner, attribute):
+        # Wrap owner.attribute so each call adds to the subsystem time
+        index = len(self.names)
+        self.names.append(name)
+        self.subsystem_time.append(array('d', bytes(8 * self.history)))
+        self.current.append(0.0)
+
+        function = getattr(owner, attribute)
+        current = self.current
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                current[index] += perf_counter() - start
+
+        # Keep static methods static (called on the class, without self)
+        if isinstance(owner, type) and isinstance(owner.__dict__.get(attribute), staticmethod):
+            timed = staticmethod(timed)
+        setattr(owner, attribute, timed)
+
+
+    def watch(self, name, namespace):
+        # Register a dotted name, e.g. 'minigame.Pattern.update'
+        parts = name.split('.')
+        if parts[0] == 'pyxel':
+            owner = self.pyxel
+        else:
+            owner = namespace[parts[0]]
+        for part in parts[1:-1]:
+            owner = getattr(owner, part)
+
+        self.register(name, owner, parts[-1])
+
+
+    # ==================================================================
+    # FRAMES
+    # ==================================================================
+
+    def end_frame(self):
+        # Store this frame's subsystem times and move to the next slot
+        position = self.position
+        for i in range(len(self.current)):
+            self.subsystem_time[i][position] = self.current[i]
+            self.current[i] = 0.0
+
+        self.position = (position + 1) % self.history
+        self.frames += 1
+
+
+    def last(self, buffer):
+        return buffer[(self.position - 1) % self.history]
+
+
+    def mean(self, buffer):
+        count = min(self.frames, self.history)
+        if count == 0:
+            return 0.0
+        if count == self.history:
+            return sum(buffer) / count
+
+        total = 0.0
+        for i in range(count):
+            total += buffer[i]
+        return total / count
+
+
+    def install(self, subsystems = ()):
+        # Wrap pyxel.run: time update and draw, draw the overlay on top
+        pyxel = self.pyxel
+        run = pyxel.run
+        perf_counter = time.perf_counter
+        toggle_key = getattr(pyxel, TOGGLE_KEY)
+
+        def profiled_run(update, draw):
+
+            # Game globals are only known once the game starts (the game
+            # script runs as __main__)
+            namespace = vars(sys.modules['__main__'])
+            for name in subsystems:
+                self.watch(name, namespace)
+
+            def profiled_update():
+                if pyxel.btnp(toggle_key):
+                    self.visible = not self.visible
+
+                start = perf_counter()
+                update()
+                self.update_time[self.position] = perf_counter() - start
+
+            def profiled_draw():
+                start = perf_counter()
+                draw()
+                self.draw_time[self.position] = perf_counter() - start
+
+                self.end_frame()
+                if self.visible:
+                    self.draw()
+
+            run(profiled_update, profiled_draw)
+
+        pyxel.run = profiled_run
+
+
+    # ==================================================================
+    # OVERLAY
+    # ==================================================================
+
+    def draw(self):
+        pyxel = self.pyxel
+        pyxel.camera()
+
+        budget = 1 / pyxel.fps if getattr(pyxel, 'fps', 0) else 1 / 30
+        width = min(pyxel.width - 4, self.history)
+        lines = 3 + len(self.names)
+        height = lines * 7 + SPARKLINE_HEIGHT + 4
+        pyxel.rect(0, 0, width + 4, height, COLOR_BG)
+
+        update_time = self.last(self.update_time)
+        draw_time = self.last(self.draw_time)
+        pyxel.text(2, 2, f"FRAME {(update_time + draw_time) * 1000:.2f}ms", COLOR_TEXT)
+        pyxel.text(2, 9, f"UPD {update_time * 1000:.2f} DRW {draw_time * 1000:.2f}", COLOR_TEXT)
+        pyxel.text(2, 16, f"BUDGET {budget * 1000:.1f}ms", COLOR_BUDGET)
+
+        # Sparkline of update + draw, the top of the box is the budget
+        bottom = 23 + SPARKLINE_HEIGHT
+        for x in range(width):
+            i = (self.position - width + x) % self.history
+            frame_time = self.update_time[i] + self.draw_time[i]
+            h = min(int(frame_time / budget * SPARKLINE_HEIGHT) + 1, SPARKLINE_HEIGHT)
+            col = COLOR_OK if frame_time <= budget else COLOR_OVER
+            pyxel.line(2 + x, bottom, 2 + x, bottom - h + 1, col)
+
+        # Subsystems: last frame and mean over the history
+        y = bottom + 3
+        for name, buffer in zip(self.names, self.subsystem_time):
+            short = '.'.join(name.split('.')[-2:])
+            pyxel.text(
+                2, y,
+                f"{short} {self.last(buffer) * 1000:.2f}/{self.mean(buffer) * 1000:.2f}",
+                COLOR_TEXT
+            )
+            y += 7
+
+
+
+def default_subsystems(script):
+    path = os.path.abspath(script)
+    game = os.path.basename(os.path.dirname(path))
+    return SUBSYSTEMS.get(os.path.basename(path), {}).get(game, ())
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Run a game with the frame profiler overlay (F1)")
+    parser.add_argument('script', help = "game script, e.g. 2d_dd/game.py")
+    parser.add_argument('--watch', nargs = '+', default = [], help = "extra subsystems, e.g. party.Camera.follow")
+    parser.add_argument('--history', type = int, default = HISTORY)
+    parser.add_argument('--show', action = 'store_true', help = "show the overlay at start")
+    args = parser.parse_args()
+
+    import pyxel
+    profiler = Profiler(pyxel, args.history)
+    profiler.visible = args.show
+    profiler.install(subsystems = default_subsystems(args.script) + tuple(args.watch))
+    run_script(args.script)
+
+
+if __name__ == '__main__':
+    main()
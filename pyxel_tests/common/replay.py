@@ -0,0 +1,270 @@
+# ======================================================================
+# INPUT RECORD / REPLAY
+# ======================================================================
+# Records the state of the game keys at every frame as a bitmask, and
+# plays it back in place of pyxel.btn / pyxel.btnp. The random seed is
+# stored with the input, so a session replays bit for bit.
+#
+# Usage (from pyxel_tests/):
+#   python -m common.replay record fishing_02/iteration_03.py session.rep
+#   python -m common.replay play fishing_02/iteration_03.py session.rep
+#   python -m common.replay play fishing_02/iteration_03.py session.rep --headless
+#
+# File format (little endian):
+#   header: b'PXRP', version (u8), number of keys (u8), seed (u64),
+#           key codes (u32 each)
+#   frames: one u32 per frame, btn bits (0-15) and btnp bits (16-31)
+
+import argparse
+import os
+import random
+import runpy
+import struct
+import sys
+import time
+from array import array
+
+from common import loop
+
+
+
+# Keys recorded, in bit order
+KEYS = (
+    'KEY_SPACE',
+    'KEY_BACKSPACE',
+    'KEY_1',
+    'KEY_2',
+    'KEY_UP',
+    'KEY_DOWN',
+    'KEY_LEFT',
+    'KEY_RIGHT',
+    'KEY_Q'
+)
+
+# btnp bits come after the btn bits
+BTNP_SHIFT = 16
+
+# File layout
+MAGIC = b'PXRP'
+VERSION = 1
+HEADER = struct.Struct('<4sBBQ')
+KEY = struct.Struct('<I')
+FRAME = struct.Struct('<I')
+
+
+
+class Recording:
+    def __init__(self, seed, keys, frames = None):
+        self.seed = seed
+        self.keys = tuple(keys)
+        self.frames = frames if frames is not None else array('I')
+
+
+    def header(self):
+        return (
+            HEADER.pack(MAGIC, VERSION, len(self.keys), self.seed)
+            + b''.join(KEY.pack(key) for key in self.keys)
+        )
+
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.header())
+            for mask in self.frames:
+                f.write(FRAME.pack(mask))
+
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        magic, version, n_keys, seed = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay file")
+
+        offset = HEADER.size
+        keys = [KEY.unpack_from(data, offset + i * KEY.size)[0] for i in range(n_keys)]
+        offset += n_keys * KEY.size
+
+        # A recording cut while writing a frame drops the partial frame
+        end = offset + (len(data) - offset) // FRAME.size * FRAME.size
+        frames = array('I', (mask for (mask,) in FRAME.iter_unpack(data[offset:end])))
+
+        return cls(seed, keys, frames)
+
+
+
+class Recorder:
+    # Samples the real keyboard before each update and appends it to the
+    # file right away: pyxel may end the process without returning
+
+    def __init__(self, pyxel, path, seed):
+        self.btn = pyxel.btn
+        self.btnp = pyxel.btnp
+        self.recording = Recording(seed, [getattr(pyxel, name) for name in KEYS])
+
+        self.file = open(path, 'wb')
+        self.file.write(self.recording.header())
+        self.file.flush()
+
+
+    def sample(self):
+        mask = 0
+        for bit, key in enumerate(self.recording.keys):
+            if self.btn(key):
+                mask |= 1 << bit
+            if self.btnp(key):
+                mask |= 1 << (bit + BTNP_SHIFT)
+
+        self.recording.frames.append(mask)
+        if not self.file.closed:
+            self.file.write(FRAME.pack(mask))
+            self.file.flush()
+
+
+    def close(self):
+        self.file.close()
+
+
+
+class Player:
+    # Replaces pyxel.btn / pyxel.btnp with the recorded frames
+
+    def __init__(self, recording):
+        self.frames = recording.frames
+        self.bits = {key: bit for bit, key in enumerate(recording.keys)}
+        self.frame = -1
+        self.mask = 0
+
+
+    def next_frame(self):
+        # Move to the next recorded frame, False once the stream is over
+        self.frame += 1
+        if self.frame >= len(self.frames):
+            self.mask = 0
+            return False
+
+        self.mask = self.frames[self.frame]
+        return True
+
+
+    def btn(self, key):
+        bit = self.bits.get(key)
+        return bit is not None and bool(self.mask >> bit & 1)
+
+
+    def btnp(self, key, hold = 0, repeat = 0):
+        bit = self.bits.get(key)
+        return bit is not None and bool(self.mask >> (bit + BTNP_SHIFT) & 1)
+
+
+
+# ======================================================================
+# PYXEL HOOKS
+# ======================================================================
+
+def install_recorder(pyxel, path, seed = None):
+    # Seed the game randomness and record the input of every frame, with
+    # one game tick per frame so a replay runs the same ticks
+    if seed is None:
+        seed = random.getrandbits(64)
+    random.seed(seed)
+    loop.lockstep()
+
+    recorder = Recorder(pyxel, path, seed)
+    run = pyxel.run
+    quit = pyxel.quit
+
+    def record_run(update, draw):
+        def record_update():
+            recorder.sample()
+            update()
+        run(record_update, draw)
+        recorder.close()
+
+    def record_quit():
+        recorder.close()
+        quit()
+
+    pyxel.run = record_run
+    pyxel.quit = record_quit
+    return recorder
+
+
+def install_player(pyxel, recording):
+    # Seed the game randomness like the recorded session and feed the
+    # recorded input (one tick per frame), quit when the recording is over
+    random.seed(recording.seed)
+    loop.lockstep()
+
+    player = Player(recording)
+    run = pyxel.run
+
+    def replay_run(update, draw):
+        def replay_update():
+            if not player.next_frame():
+                pyxel.quit()
+                return
+            update()
+        run(replay_update, draw)
+
+    pyxel.run = replay_run
+    pyxel.btn = player.btn
+    pyxel.btnp = player.btnp
+    return player
+
+
+def use_stub_pyxel():
+    # Swap pyxel for the windowless stub, before the game imports it
+    from common import stub_pyxel
+    sys.modules['pyxel'] = stub_pyxel
+    return stub_pyxel
+
+
+def run_script(path):
+    # Run a game script like `pyxel run` does
+    path = os.path.abspath(path)
+    if os.path.dirname(path) not in sys.path:
+        sys.path.insert(0, os.path.dirname(path))
+    runpy.run_path(path, run_name = '__main__')
+
+
+
+# ======================================================================
+# COMMAND LINE
+# ======================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description = "Record or replay a pyxel_tests game session")
+    parser.add_argument('mode', choices = ['record', 'play'])
+    parser.add_argument('script', help = "game script, e.g. fishing_02/iteration_03.py")
+    parser.add_argument('file', help = "replay file")
+    parser.add_argument('--seed', type = int, help = "random seed when recording")
+    parser.add_argument('--headless', action = 'store_true', help = "play without window, as fast as possible")
+    args = parser.parse_args()
+
+    if args.mode == 'record':
+        import pyxel
+        install_recorder(pyxel, args.file, args.seed)
+        run_script(args.script)
+
+    else:
+        recording = Recording.load(args.file)
+        if args.headless:
+            pyxel = use_stub_pyxel()
+        else:
+            import pyxel
+        player = install_player(pyxel, recording)
+
+        start = time.perf_counter()
+        run_script(args.script)
+        elapsed = time.perf_counter() - start
+        print(
+            f"Replayed {min(player.frame, len(recording.frames))} frames "
+            f"in {elapsed:.3f}s ({player.frame / max(elapsed, 1e-9):.0f} fps)"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,522 @@
+# ======================================================================
+# STUB PYXEL
+# ======================================================================
+# Windowless stand-in for the part of pyxel the games use. Put it in
+# sys.modules['pyxel'] before a game is imported: run() then calls
+# update/draw as fast as possible, with no window, no audio and no sleep.
+#
+# Images, tilemaps and the screen are NumPy arrays, and drawing calls
+# render into them like pyxel does (same rounding, clipping, camera, color
+# key, flips and built-in font), so a frame can be checked pixel by pixel:
+#   pyxel.screen.data  ->  (height, width) uint8 array of colors
+#
+# Input is released unless set with set_btn() (the replay layer feeds
+# recorded input instead). Resources are read from the .pyxres file, so
+# tilemap collisions behave like in the real game.
+#
+# Usage (from pyxel_tests/, a game without window at thousands of fps):
+#   python -m common.replay play the_little_duck/game.py duck.rep --headless
+
+import math
+import os
+import sys
+import tomllib
+import zipfile
+
+import numpy as np
+
+
+
+# Keys used by the games (same values as pyxel)
+KEY_BACKSPACE = 8
+KEY_TAB = 9
+KEY_RETURN = 13
+KEY_SPACE = 32
+KEY_1 = 49
+KEY_2 = 50
+KEY_Q = 113
+KEY_RIGHT = 1073741903
+KEY_LEFT = 1073741904
+KEY_DOWN = 1073741905
+KEY_UP = 1073741906
+KEY_F1 = 1073741882
+
+# Number and size of image banks and tilemaps
+NUM_IMAGES = 3
+NUM_TILEMAPS = 8
+IMAGE_SIZE = 256
+TILEMAP_SIZE = 256
+TILE_SIZE = 8
+
+# Built-in font: 4x6 glyphs of the characters 32 to 126, pixel (x, y) is
+# bit y * 4 + x
+FONT_WIDTH = 4
+FONT_HEIGHT = 6
+FONT_DATA = (
+    0x000000, 0x020222, 0x000055, 0x057575, 0x023636, 0x041241, 0x035252, 0x000022,
+    0x042224, 0x012221, 0x052725, 0x002720, 0x012000, 0x000700, 0x020000, 0x011244,
+    0x035556, 0x022232, 0x071243, 0x034243, 0x044755, 0x034317, 0x075716, 0x011247,
+    0x075757, 0x034757, 0x002020, 0x012020, 0x042124, 0x007070, 0x012421, 0x020247,
+    0x061552, 0x055752, 0x035353, 0x061116, 0x035553, 0x071717, 0x011717, 0x065716,
+    0x055755, 0x072227, 0x025444, 0x055355, 0x071111, 0x055775, 0x055553, 0x025552,
+    0x011353, 0x067552, 0x053753, 0x034216, 0x022227, 0x065555, 0x025555, 0x057755,
+    0x055255, 0x022255, 0x071247, 0x062226, 0x044211, 0x032223, 0x000052, 0x070000,
+    0x000021, 0x065560, 0x035531, 0x061160, 0x065564, 0x063560, 0x022724, 0x247560,
+    0x055531, 0x022202, 0x254404, 0x053351, 0x072223, 0x057770, 0x055530, 0x025520,
+    0x135530, 0x465560, 0x011160, 0x036360, 0x062272, 0x065550, 0x025550, 0x077550,
+    0x052250, 0x246550, 0x072470, 0x062326, 0x022222, 0x032623, 0x000036
+)
+
+# Resource file member
+RESOURCE_FILE = 'pyxel_resource.toml'
+
+
+
+# Screen
+width = 0
+height = 0
+fps = 30
+title = ''
+
+# Frames
+frame_count = 0
+
+# Stop run() after this many frames (None = until quit())
+max_frames = None
+
+_running = False
+
+# Frame each held key was pressed on, by key
+_pressed = {}
+
+
+
+def _round(value):
+    # pyxel rounds coordinates half up
+    return math.floor(value + 0.5)
+
+
+def _glyphs():
+    # Boolean mask of every glyph, by character
+    bits = np.arange(FONT_WIDTH * FONT_HEIGHT).reshape(FONT_HEIGHT, FONT_WIDTH)
+    return {
+        chr(32 + i): (data >> bits) & 1 == 1
+        for i, data in enumerate(FONT_DATA)
+    }
+
+
+GLYPHS = _glyphs()
+
+# Masks of the strings drawn, games draw the same few ones every frame
+TEXT_CACHE_SIZE = 256
+_text_masks = {}
+
+
+def _text_mask(s):
+    # Boolean mask of a whole string (lines go down by the font height)
+    mask = _text_masks.get(s)
+    if mask is not None:
+        return mask
+
+    lines = s.split('\n')
+    mask = np.zeros((len(lines) * FONT_HEIGHT, max(map(len, lines)) * FONT_WIDTH), dtype = bool)
+    for row, line in enumerate(lines):
+        for column, char in enumerate(line):
+            glyph = GLYPHS.get(char)
+            if glyph is not None:
+                mask[
+                    row * FONT_HEIGHT:(row + 1) * FONT_HEIGHT,
+                    column * FONT_WIDTH:(column + 1) * FONT_WIDTH
+                ] = glyph
+
+    if len(_text_masks) >= TEXT_CACHE_SIZE:
+        _text_masks.clear()
+    _text_masks[s] = mask
+    return mask
+
+
+def _span(position, start, size, target_size, source_size, flip):
+    # Part of a copy of `size` items from `start` to `position` inside both
+    # the target and the source: target and source slices, or None
+    low = max(0, -position, -start if not flip else start + size - source_size)
+    high = min(size, target_size - position, source_size - start if not flip else start + size)
+    if low >= high:
+        return None
+
+    target = slice(position + low, position + high)
+    if flip:
+        source = slice(start + size - high, start + size - low)
+    else:
+        source = slice(start + low, start + high)
+    return target, source
+
+
+
+class Image:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+        # Colors, row by row
+        self.data = np.zeros((height, width), dtype = np.uint8)
+
+        # Drawing offset, set by camera()
+        self.camera_x = 0
+        self.camera_y = 0
+
+
+    def data_ptr(self):
+        # Raw memory, like pyxel (the asset bundles copy banks into it)
+        return np.ctypeslib.as_ctypes(self.data.reshape(-1))
+
+
+    def tiles(self):
+        # 8x8 tiles view of the colors: tiles()[ty, tx] is a tile
+        return self.data.reshape(
+            self.height // TILE_SIZE, TILE_SIZE, self.width // TILE_SIZE, TILE_SIZE
+        ).transpose(0, 2, 1, 3)
+
+
+    def camera(self, x = 0, y = 0):
+        self.camera_x = _round(x)
+        self.camera_y = _round(y)
+
+
+    def pget(self, x, y):
+        x = _round(x)
+        y = _round(y)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return int(self.data[y, x])
+        return 0
+
+
+    def pset(self, x, y, col):
+        x = _round(x) - self.camera_x
+        y = _round(y) - self.camera_y
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.data[y, x] = col
+
+
+    def cls(self, col):
+        self.data.fill(col)
+
+
+    def rect(self, x, y, w, h, col):
+        x = _round(x) - self.camera_x
+        y = _round(y) - self.camera_y
+        w = _round(w)
+        h = _round(h)
+        self.data[max(y, 0):max(y + h, 0), max(x, 0):max(x + w, 0)] = col
+
+
+    def rectb(self, x, y, w, h, col):
+        w = _round(w)
+        h = _round(h)
+        if w <= 0 or h <= 0:
+            return
+        self.rect(x, y, w, 1, col)
+        self.rect(x, y + h - 1, w, 1, col)
+        self.rect(x, y, 1, h, col)
+        self.rect(x + w - 1, y, 1, h, col)
+
+
+    def line(self, x1, y1, x2, y2, col):
+        x1, y1, x2, y2 = _round(x1), _round(y1), _round(x2), _round(y2)
+        steps = max(abs(x2 - x1), abs(y2 - y1))
+        t = np.arange(steps + 1) / max(steps, 1)
+        xs = np.floor(x1 + (x2 - x1) * t + 0.5).astype(np.intp) - self.camera_x
+        ys = np.floor(y1 + (y2 - y1) * t + 0.5).astype(np.intp) - self.camera_y
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.data[ys[inside], xs[inside]] = col
+
+
+    def blt(self, x, y, img, u, v, w, h, colkey = None, **kwargs):
+        source = images[img] if isinstance(img, int) else img
+        x = _round(x) - self.camera_x
+        y = _round(y) - self.camera_y
+        u, v, w, h = _round(u), _round(v), _round(w), _round(h)
+
+        # Negative sizes flip the copy
+        columns = _span(x, u, abs(w), self.width, source.width, w < 0)
+        rows = _span(y, v, abs(h), self.height, source.height, h < 0)
+        if columns is None or rows is None:
+            return
+
+        block = source.data[rows[1], columns[1]]
+        if w < 0:
+            block = block[:, ::-1]
+        if h < 0:
+            block = block[::-1]
+        self.draw_block(rows[0], columns[0], block, colkey)
+
+
+    def bltm(self, x, y, tm, u, v, w, h, colkey = None, **kwargs):
+        tilemap = tilemaps[tm] if isinstance(tm, int) else tm
+        source = images[tilemap.imgsrc] if isinstance(tilemap.imgsrc, int) else tilemap.imgsrc
+        x = _round(x) - self.camera_x
+        y = _round(y) - self.camera_y
+        u, v, w, h = _round(u), _round(v), _round(w), _round(h)
+
+        # Pixels of the tilemap to draw (u, v, w, h are in pixels)
+        columns = _span(x, u, abs(w), self.width, tilemap.width * TILE_SIZE, w < 0)
+        rows = _span(y, v, abs(h), self.height, tilemap.height * TILE_SIZE, h < 0)
+        if columns is None or rows is None:
+            return
+
+        # Tiles under these pixels, then their 8x8 pixels in the image,
+        # gathered a whole tile at a time
+        x0, x1 = columns[1].start // TILE_SIZE, (columns[1].stop - 1) // TILE_SIZE + 1
+        y0, y1 = rows[1].start // TILE_SIZE, (rows[1].stop - 1) // TILE_SIZE + 1
+        tiles = tilemap.data[y0:y1, x0:x1]
+        pixels = source.tiles()[
+            np.minimum(tiles[..., 1], source.height // TILE_SIZE - 1),
+            np.minimum(tiles[..., 0], source.width // TILE_SIZE - 1)
+        ]
+        block = pixels.transpose(0, 2, 1, 3).reshape((y1 - y0) * TILE_SIZE, (x1 - x0) * TILE_SIZE)
+
+        block = block[
+            rows[1].start - y0 * TILE_SIZE:rows[1].stop - y0 * TILE_SIZE,
+            columns[1].start - x0 * TILE_SIZE:columns[1].stop - x0 * TILE_SIZE
+        ]
+        if w < 0:
+            block = block[:, ::-1]
+        if h < 0:
+            block = block[::-1]
+        self.draw_block(rows[0], columns[0], block, colkey)
+
+
+    def text(self, x, y, s, col, **kwargs):
+        self.draw_mask(_round(x) - self.camera_x, _round(y) - self.camera_y, _text_mask(s), col)
+
+
+    def draw_block(self, rows, columns, block, colkey):
+        # Copy a block of colors, but the color key
+        target = self.data[rows, columns]
+        if colkey is None:
+            target[:] = block
+        else:
+            np.copyto(target, block, where = block != colkey)
+
+
+    def draw_mask(self, x, y, mask, col):
+        height, width = mask.shape
+        columns = _span(x, 0, width, self.width, width, False)
+        rows = _span(y, 0, height, self.height, height, False)
+        if columns is None or rows is None:
+            return
+        self.data[rows[0], columns[0]][mask[rows[1], columns[1]]] = col
+
+
+
+class Tilemap:
+    def __init__(self, width, height, imgsrc = 0):
+        self.width = width
+        self.height = height
+        self.imgsrc = imgsrc
+
+        # (tile x, tile y) of every tile, row by row
+        self.data = np.zeros((height, width, 2), dtype = np.uint16)
+
+
+    def data_ptr(self):
+        return np.ctypeslib.as_ctypes(self.data.reshape(-1))
+
+
+    def pget(self, x, y):
+        x = _round(x)
+        y = _round(y)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            tile = self.data[y, x]
+            return int(tile[0]), int(tile[1])
+        return 0, 0
+
+
+    def pset(self, x, y, tile):
+        x = _round(x)
+        y = _round(y)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.data[y, x] = tile
+
+
+    def cls(self, tile):
+        self.data[:] = tile
+
+
+    def blt(self, x, y, tm, u, v, w, h, tilekey = None, **kwargs):
+        # Copy tiles (x, y, u, v, w, h are in tiles)
+        source = tilemaps[tm] if isinstance(tm, int) else tm
+        columns = _span(x, u, abs(w), self.width, source.width, w < 0)
+        rows = _span(y, v, abs(h), self.height, source.height, h < 0)
+        if columns is None or rows is None:
+            return
+
+        block = source.data[rows[1], columns[1]]
+        if w < 0:
+            block = block[:, ::-1]
+        if h < 0:
+            block = block[::-1]
+
+        target = self.data[rows[0], columns[0]]
+        if tilekey is None:
+            target[:] = block
+        else:
+            keep = (block == tuple(tilekey)).all(axis = 2)
+            np.copyto(target, block, where = ~keep[..., None])
+
+
+
+images = [Image(IMAGE_SIZE, IMAGE_SIZE) for _ in range(NUM_IMAGES)]
+tilemaps = [Tilemap(TILEMAP_SIZE, TILEMAP_SIZE) for _ in range(NUM_TILEMAPS)]
+screen = Image(0, 0)
+
+
+
+# ======================================================================
+# SYSTEM
+# ======================================================================
+
+def init(width, height, title = '', fps = 30, **kwargs):
+    # Module level state, so `pyxel.width` reads the current value
+    global screen
+    globals().update(width = width, height = height, title = title, fps = fps)
+    screen = Image(width, height)
+
+
+def run(update, draw):
+    global frame_count, _running
+    _running = True
+
+    while _running:
+        if max_frames is not None and frame_count >= max_frames:
+            break
+
+        update()
+        draw()
+        frame_count += 1
+
+    _running = False
+
+
+def quit():
+    global _running
+    _running = False
+
+
+
+# ======================================================================
+# RESOURCES
+# ======================================================================
+
+def resource_path(filename):
+    # Like pyxel, relative paths start from the running script directory
+    if os.path.isabs(filename):
+        return filename
+
+    main = sys.modules.get('__main__')
+    main_file = getattr(main, '__file__', None)
+    if main_file:
+        return os.path.join(os.path.dirname(os.path.abspath(main_file)), filename)
+    return filename
+
+
+def read_resource(filename):
+    with zipfile.ZipFile(resource_path(filename)) as archive:
+        return tomllib.loads(archive.read(RESOURCE_FILE).decode())
+
+
+def load(filename, exclude_images = False, exclude_tilemaps = False, **kwargs):
+    # Banks are filled in place (games may hold them), rows may be cut short
+    resource = read_resource(filename)
+
+    if not exclude_images:
+        for i, data in enumerate(resource.get('images', [])[:NUM_IMAGES]):
+            image = images[i]
+            image.data.fill(0)
+            for y, row in enumerate(data['data'][:image.height]):
+                row = row[:image.width]
+                image.data[y, :len(row)] = row
+
+    if not exclude_tilemaps:
+        for i, data in enumerate(resource.get('tilemaps', [])[:NUM_TILEMAPS]):
+            tilemap = tilemaps[i]
+            tilemap.imgsrc = data.get('imgsrc', 0)
+            tilemap.data.fill(0)
+            for y, row in enumerate(data['data'][:tilemap.height]):
+                # Rows are flat (tile x, tile y) pairs
+                row = row[:tilemap.width * 2]
+                tilemap.data[y, :len(row) // 2] = np.reshape(row[:len(row) // 2 * 2], (-1, 2))
+
+
+
+# ======================================================================
+# INPUT
+# ======================================================================
+
+def set_btn(key, pressed):
+    # Press or release a key, from the next btn() / btnp() call
+    if pressed:
+        _pressed.setdefault(key, frame_count)
+    else:
+        _pressed.pop(key, None)
+
+
+def btn(key):
+    return key in _pressed
+
+
+def btnp(key, hold = 0, repeat = 0):
+    # Pressed on this frame, then every `repeat` frames after `hold` ones
+    start = _pressed.get(key)
+    if start is None:
+        return False
+
+    held = frame_count - start
+    if held == 0:
+        return True
+    return repeat > 0 and held >= hold and (held - hold) % repeat == 0
+
+
+
+# ======================================================================
+# GRAPHICS
+# ======================================================================
+# Screen drawing, through the screen image (and its camera)
+
+def cls(col):
+    screen.cls(col)
+
+
+def camera(x = 0, y = 0):
+    screen.camera(x, y)
+
+
+def pget(x, y):
+    return screen.pget(x, y)
+
+
+def pset(x, y, col):
+    screen.pset(x, y, col)
+
+
+def line(x1, y1, x2, y2, col):
+    screen.line(x1, y1, x2, y2, col)
+
+
+def rect(x, y, w, h, col):
+    screen.rect(x, y, w, h, col)
+
+
+def rectb(x, y, w, h, col):
+    screen.rectb(x, y, w, h, col)
+
+
+def blt(x, y, img, u, v, w, h, colkey = None, **kwargs):
+    screen.blt(x, y, img, u, v, w, h, colkey, **kwargs)
+
+
+def bltm(x, y, tm, u, v, w, h, colkey = None, **kwargs):
+    screen.bltm(x, y, tm, u, v, w, h, colkey, **kwargs)
+
+
+def text(x, y, s, col, **kwargs):
+    screen.text(x, y, s, col, **kwargs)
@@ -0,0 +1,338 @@
+# ======================================================================
+# FRAME TELEMETRY
+# ======================================================================
+# Logs every frame of a play or replay session, and writes the log to a
+# CSV or JSON file when the game exits:
+# - update and draw time
+# - garbage collections run during the frame, and the time they took
+# - blt / bltm calls issued
+# - game counters, e.g. the fishing distance or the pattern speed
+#
+# Columns are arrays allocated once for the whole session, so logging a
+# frame does not allocate. Frames after the capacity are counted, not
+# logged.
+#
+# Counters are dotted names looked up from the game App at the end of
+# every frame, e.g. 'trip.fishing.distance_current' (empty when the
+# value does not exist, like between two fishing sessions).
+#
+# Usage (from pyxel_tests/):
+#   python -m common.telemetry fishing_02/iteration_03.py --out fishing.csv
+#   python -m common.telemetry 2d_dd/game.py --out dd.json --replay dd.rep --headless
+#   python -m common.telemetry the_little_duck/game.py --out duck.csv --counters loop.dropped
+
+import argparse
+import atexit
+import csv
+import gc
+import json
+import math
+import operator
+import os
+import time
+from array import array
+
+from common import loop
+from common import replay
+
+
+
+# Counters logged by default, per game script
+COUNTERS = {
+    'game.py': {
+        'fishing_01': ('game.hook.y', 'loop.frame_ticks'),
+        '2d_dd': ('game.camera.X', 'dungeon.loads', 'loop.frame_ticks'),
+        'the_little_duck': ('game.player.X', 'game.player.Y', 'loop.frame_ticks')
+    },
+    'iteration_03.py': {
+        'fishing_02': (
+            'trip.fishing.distance_current',
+            'trip.fishing.pattern.speed',
+            'loop.frame_ticks'
+        )
+    }
+}
+
+# Frames logged at most (30 minutes at 30 fps)
+CAPACITY = 30 * 60 * 30
+
+# Slowest frames listed in the summary
+HITCHES = 5
+
+# Frame budget when pyxel does not tell its fps
+FPS = 30
+
+
+
+class Telemetry:
+    def __init__(self, pyxel, capacity = CAPACITY, counters = ()):
+        self.pyxel = pyxel
+        self.capacity = capacity
+        self.script = None
+
+        # One column per logged value, frame being written
+        self.update_time = array('d', bytes(8 * capacity))
+        self.draw_time = array('d', bytes(8 * capacity))
+        self.gc_collections = array('I', bytes(4 * capacity))
+        self.gc_time = array('d', bytes(8 * capacity))
+        self.blt_calls = array('I', bytes(4 * capacity))
+        self.bltm_calls = array('I', bytes(4 * capacity))
+        self.frame = 0
+        self.dropped = 0
+
+        # Game counters: names, getters and columns
+        self.counter_names = list(counters)
+        self.counter_getters = [operator.attrgetter(name) for name in counters]
+        self.counter_values = [array('d', bytes(8 * capacity)) for _ in counters]
+
+        # Counts of the frame being run, game App the counters read from
+        self.current_collections = 0
+        self.current_gc_time = 0.0
+        self.current_blt = 0
+        self.current_bltm = 0
+        self.gc_start = 0.0
+        self.app = None
+
+        self.saved = False
+
+
+    # ==================================================================
+    # HOOKS
+    # ==================================================================
+
+    def on_gc(self, phase, info):
+        if phase == 'start':
+            self.gc_start = time.perf_counter()
+        else:
+            self.current_collections += 1
+            self.current_gc_time += time.perf_counter() - self.gc_start
+
+
+    def count_calls(self, attribute):
+        # Wrap pyxel.blt / pyxel.bltm to count the calls of each frame
+        function = getattr(self.pyxel, attribute)
+        counter = 'current_' + attribute
+
+        def counted(*args, **kwargs):
+            setattr(self, counter, getattr(self, counter) + 1)
+            return function(*args, **kwargs)
+
+        setattr(self.pyxel, attribute, counted)
+
+
+    def install(self, path = None, script = None):
+        # Wrap pyxel.run: time update and draw, log the frame after draw,
+        # and write the log to path when the game exits
+        pyxel = self.pyxel
+        run = pyxel.run
+        perf_counter = time.perf_counter
+        self.script = script
+
+        self.count_calls('blt')
+        self.count_calls('bltm')
+
+        def logged_run(update, draw):
+            self.app = game_app(update)
+            gc.callbacks.append(self.on_gc)
+
+            def logged_update():
+                start = perf_counter()
+                update()
+                if self.frame < self.capacity:
+                    self.update_time[self.frame] = perf_counter() - start
+
+            def logged_draw():
+                start = perf_counter()
+                draw()
+                if self.frame < self.capacity:
+                    self.draw_time[self.frame] = perf_counter() - start
+                self.end_frame()
+
+            try:
+                run(logged_update, logged_draw)
+            finally:
+                gc.callbacks.remove(self.on_gc)
+
+        pyxel.run = logged_run
+
+        # pyxel runs the exit functions when the window is closed
+        if path:
+            atexit.register(self.save, path)
+
+
+    # ==================================================================
+    # FRAMES
+    # ==================================================================
+
+    def end_frame(self):
+        frame = self.frame
+        if frame >= self.capacity:
+            self.dropped += 1
+        else:
+            self.gc_collections[frame] = self.current_collections
+            self.gc_time[frame] = self.current_gc_time
+            self.blt_calls[frame] = self.current_blt
+            self.bltm_calls[frame] = self.current_bltm
+
+            for getter, values in zip(self.counter_getters, self.counter_values):
+                try:
+                    values[frame] = float(getter(self.app))
+                except (AttributeError, TypeError, ValueError):
+                    values[frame] = math.nan
+            self.frame += 1
+
+        self.current_collections = 0
+        self.current_gc_time = 0.0
+        self.current_blt = 0
+        self.current_bltm = 0
+
+
+    def columns(self):
+        # Logged frames, by column (times in microseconds)
+        count = self.frame
+        columns = {
+            'frame': range(count),
+            'update_us': [t * 1e6 for t in self.update_time[:count]],
+            'draw_us': [t * 1e6 for t in self.draw_time[:count]],
+            'gc_collections': self.gc_collections[:count],
+            'gc_us': [t * 1e6 for t in self.gc_time[:count]],
+            'blt': self.blt_calls[:count],
+            'bltm': self.bltm_calls[:count]
+        }
+        for name, values in zip(self.counter_names, self.counter_values):
+            columns[name] = values[:count]
+        return columns
+
+
+    # ==================================================================
+    # EXPORT
+    # ==================================================================
+
+    def save(self, path):
+        # Once, whether the game returned or pyxel is exiting
+        if self.saved:
+            return
+        self.saved = True
+
+        if os.path.splitext(path)[1].lower() == '.json':
+            self.save_json(path)
+        else:
+            self.save_csv(path)
+
+
+    def save_csv(self, path):
+        columns = self.columns()
+        with open(path, 'w', newline = '') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in zip(*columns.values()):
+                writer.writerow(
+                    '' if isinstance(value, float) and math.isnan(value) else value
+                    for value in row
+                )
+
+
+    def save_json(self, path):
+        # Missing counter values are null (JSON has no NaN)
+        columns = {
+            name: [None if isinstance(value, float) and math.isnan(value) else value for value in values]
+            for name, values in self.columns().items()
+        }
+        with open(path, 'w') as f:
+            json.dump({
+                'script': self.script,
+                'fps': getattr(self.pyxel, 'fps', FPS),
+                'frames': self.frame,
+                'dropped': self.dropped,
+                'columns': columns
+            }, f)
+
+
+    def summary(self, hitches = HITCHES):
+        count = self.frame
+        if count == 0:
+            return "No frame logged"
+
+        budget = 1 / getattr(self.pyxel, 'fps', FPS)
+        frame_time = [u + d for u, d in zip(self.update_time[:count], self.draw_time[:count])]
+        over = sum(1 for t in frame_time if t > budget)
+        lines = [
+            f"{count} frames ({self.dropped} not logged), "
+            f"update {sum(self.update_time[:count]) / count * 1e6:.1f}us, "
+            f"draw {sum(self.draw_time[:count]) / count * 1e6:.1f}us, "
+            f"{over} over the {budget * 1000:.1f}ms budget, "
+            f"{sum(self.gc_collections[:count])} collections"
+        ]
+
+        # Slowest frames, with what they did
+        for frame in sorted(range(count), key = frame_time.__getitem__, reverse = True)[:hitches]:
+            line = (
+                f"  frame {frame}: {frame_time[frame] * 1e6:.1f}us "
+                f"(update {self.update_time[frame] * 1e6:.1f}, draw {self.draw_time[frame] * 1e6:.1f}, "
+                f"gc {self.gc_collections[frame]}x {self.gc_time[frame] * 1e6:.1f}) "
+                f"blt {self.blt_calls[frame]} bltm {self.bltm_calls[frame]}"
+            )
+            for name, values in zip(self.counter_names, self.counter_values):
+                line += f" {name.split('.')[-1]} {values[frame]:g}"
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+
+def game_app(update):
+    # The App the update callback belongs to, behind the fixed timestep
+    # loop if the game runs one
+    owner = getattr(update, '__self__', None)
+    if isinstance(owner, loop.FixedTimestep):
+        owner = getattr(owner.update_tick, '__self__', None)
+    return owner
+
+
+def default_counters(script):
+    path = os.path.abspath(script)
+    game = os.path.basename(os.path.dirname(path))
+    return COUNTERS.get(os.path.basename(path), {}).get(game, ())
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Log the frames of a game session to CSV or JSON")
+    parser.add_argument('script', help = "game script, e.g. fishing_02/iteration_03.py")
+    parser.add_argument('--out', required = True, help = "log file, .csv or .json")
+    parser.add_argument('--counters', nargs = '+', default = [], help = "extra counters, e.g. loop.dropped")
+    parser.add_argument('--capacity', type = int, default = CAPACITY, help = "frames logged at most")
+    parser.add_argument('--replay', help = "play a recorded session as input")
+    parser.add_argument('--headless', action = 'store_true', help = "run without window, as fast as possible")
+    parser.add_argument('--frames', type = int, help = "stop after this many frames (headless)")
+    args = parser.parse_args()
+
+    if args.headless:
+        pyxel = replay.use_stub_pyxel()
+        pyxel.max_frames = args.frames
+        if args.replay is None and args.frames is None:
+            parser.error("--headless needs --replay or --frames")
+
+        # The stub runs frames as fast as it can: one tick per frame, like
+        # a replay
+        loop.lockstep()
+    else:
+        import pyxel
+
+    if args.replay:
+        replay.install_player(pyxel, replay.Recording.load(args.replay))
+
+    # Installed last: the game update and draw are timed without the
+    # replay layer
+    telemetry = Telemetry(
+        pyxel,
+        capacity = args.capacity,
+        counters = default_counters(args.script) + tuple(args.counters)
+    )
+    telemetry.install(args.out, script = args.script)
+    atexit.register(lambda: print(telemetry.summary()))
+
+    replay.run_script(args.script)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+# ======================================================================
+# FISHING 01 - SIMULATION
+# ======================================================================
+# The fishing frame and the hook moving in it, for both fishing modes,
+# without pyxel. Nothing is built at import, games are made on demand:
+#
+#   game = new_game()
+#   game.update(press = True)
+#   game.hook.y
+#
+# game.py is the pyxel front-end: it reads the keyboard and draws.
+#
+# FixedHook moves on fixed-point integers instead of floats, so every
+# platform and process gets the exact same hook positions:
+#   game = new_game(hook_class = FixedHook)
+
+from enum import Enum
+
+
+
+TILE_SIZE = 8
+
+SCREEN_HEIGHT = 160
+SCREEN_WIDTH = 240
+
+# Fixed-point physics: positions and speeds in 1/FIXED_SCALE pixel
+FIXED_SCALE = 1000000
+
+
+
+# Enums
+class FishingModes(Enum):
+    DREDGE = "Dredge"
+    STARDEW = "Stardew"
+
+
+
+class FishingFrame:
+
+    def __init__(self, x, y):
+
+        # Frame
+        self.x = x
+        self.y = y
+        self.w = TILE_SIZE
+        self.h = 7 * TILE_SIZE
+
+        # Target area
+        self.target_y = 8
+        self.target_h = 16
+
+
+    def new_target_area(self):
+        # Define random target area limitations
+        hmax = 16
+        # TODO: Generate a random new target area
+
+
+
+class Hook:
+
+    # No per-instance dict
+    __slots__ = (
+        'frame', 'y', 'd_speed', 's_speed',
+        'flap_cooldown', 'flap_cooldown_value', 'flap_frame', 'flap_animate',
+        'u', 'v', 'w', 'h', 'xmin', 'xmax', 'ymin', 'ymax',
+        'fishing_mode', 'bouncing'
+    )
+
+    def __init__(self, fishing_frame):
+
+        self.frame = fishing_frame
+        self.y = self.frame.y + (self.frame.h / 2)
+
+        # Dredge fishing mode
+        self.d_speed = 1
+
+        # Stardew fishing mode
+        self.s_speed = 1
+
+        self.flap_cooldown = 0
+        self.flap_cooldown_value = 5 # Can flap every x frames
+
+        self.flap_frame = -1 # Flap animation frame count
+        self.flap_animate = [3, 2, 1, 0, 0, 0, -0.5]
+
+        # Sprite
+        self.u = 0
+        self.v = 1 * TILE_SIZE + 2
+        self.w = 8
+        self.h = 4
+
+        # Bbox
+        self.xmin = 1
+        self.xmax = 7
+        self.ymin = 1
+        self.ymax = 10
+
+        # Fishing mode
+        self.fishing_mode = FishingModes.STARDEW
+
+        # Animations
+        self.bouncing = False
+
+
+    def move(self, flap = False):
+        # ==============================================================
+        # DREDGE FISHING
+        # ==============================================================
+        if self.fishing_mode == FishingModes.DREDGE:
+            # Move the hook between top and bottom
+            self.y += self.d_speed
+            if self.hits_frame_top() or self.hits_frame_bottom():
+                self.d_speed = -self.d_speed
+        
+        # ==============================================================
+        # STARDEW FISHING
+        # ==============================================================
+        elif self.fishing_mode == FishingModes.STARDEW:
+            # Reduce "Flap" cooldown
+            if self.flap_cooldown > 0:
+                self.flap_cooldown -= 1
+            
+            # Start "flap" animation when SPACE is pressed
+            if flap and self.flap_cooldown == 0:
+                self.flap_frame = 0 # Start flapping
+                self.flap_cooldown = self.flap_cooldown_value
+            
+            # Either flap (if anim is triggered) or fall
+            if self.flap_frame >= 0:
+                # Calculate next movement speed
+                movement = self.flap()
+
+                # If next movement goes further than top, limit it
+                frame_top = self.frame.y + 1
+                next_y = self.y - movement
+                if next_y <= frame_top:
+                    movement = self.y - frame_top
+
+                self.y -= movement
+
+                # If we reached the last frame, reset animation
+                if self.flap_frame == (len(self.flap_animate) - 1):
+                    self.flap_frame = -1
+                else:
+                    self.flap_frame += 1
+            
+            # If not flapping, then falling
+            elif not self.hits_frame_bottom():
+                self.y += self.s_speed
+    
+
+    def flap(self):
+        if self.flap_frame >= 0:
+            return self.flap_animate[self.flap_frame]
+        else: # Just a security, this shouldn't happen
+            return self.s_speed
+    
+
+    def hits_frame_top(self):
+        if self.y <= (self.frame.y + 1):
+            return True
+        
+
+    def hits_frame_bottom(self):
+        if self.y >= (self.frame.y + self.frame.h - self.h - 1):
+            return True
+    
+
+    def center_hook(self):
+        self.y = self.frame.y + (self.frame.h / 2)
+    
+
+    def is_inside(self):
+        # Target min and max y (with 1 pixel allowance)
+        ymin = self.frame.y + self.frame.target_y
+        ymax = ymin + self.frame.target_h
+
+        # Define fish hitbox (with 1 pixel allowance)
+        fishmin = self.y + 1
+        fishmax = self.y + self.h - 1
+
+        # If fish hitbox is contained by target, return true
+        if fishmin >= ymin and fishmax <= ymax:
+            return True
+        else:
+            return False
+    
+    
+    def fish(self):
+        # Caught or not (Dredge mode only, None otherwise)
+        if self.fishing_mode == FishingModes.DREDGE:
+            return self.is_inside()
+        return None
+
+
+
+def to_fixed(value):
+    return round(value * FIXED_SCALE)
+
+
+
+class FixedHook(Hook):
+    # Hook.move on integers (1/FIXED_SCALE pixel), y is kept as a float
+    # for drawing and the target check
+    __slots__ = ('y_fixed', 'd_speed_fixed', 's_speed_fixed', 'flap_animate_fixed')
+
+    def __init__(self, fishing_frame):
+        super().__init__(fishing_frame)
+        self.y_fixed = to_fixed(self.y)
+        self.d_speed_fixed = to_fixed(self.d_speed)
+        self.s_speed_fixed = to_fixed(self.s_speed)
+        self.flap_animate_fixed = [to_fixed(movement) for movement in self.flap_animate]
+
+
+    def move(self, flap = False):
+        # Dredge: move the hook between top and bottom
+        if self.fishing_mode == FishingModes.DREDGE:
+            self.y_fixed += self.d_speed_fixed
+            if self.hits_frame_top() or self.hits_frame_bottom():
+                self.d_speed_fixed = -self.d_speed_fixed
+                self.d_speed = -self.d_speed
+
+        # Stardew: flap up when SPACE is pressed, otherwise fall
+        elif self.fishing_mode == FishingModes.STARDEW:
+            if self.flap_cooldown > 0:
+                self.flap_cooldown -= 1
+
+            if flap and self.flap_cooldown == 0:
+                self.flap_frame = 0
+                self.flap_cooldown = self.flap_cooldown_value
+
+            if self.flap_frame >= 0:
+                # Flap movement, limited to the top of the frame
+                movement = self.flap_animate_fixed[self.flap_frame]
+                frame_top = to_fixed(self.frame.y + 1)
+                if self.y_fixed - movement <= frame_top:
+                    movement = self.y_fixed - frame_top
+                self.y_fixed -= movement
+
+                if self.flap_frame == (len(self.flap_animate_fixed) - 1):
+                    self.flap_frame = -1
+                else:
+                    self.flap_frame += 1
+
+            elif not self.hits_frame_bottom():
+                self.y_fixed += self.s_speed_fixed
+
+        self.y = self.y_fixed / FIXED_SCALE
+
+
+    def hits_frame_top(self):
+        return self.y_fixed <= to_fixed(self.frame.y + 1)
+
+
+    def hits_frame_bottom(self):
+        return self.y_fixed >= to_fixed(self.frame.y + self.frame.h - self.h - 1)
+
+
+    def center_hook(self):
+        super().center_hook()
+        self.y_fixed = to_fixed(self.y)
+
+
+
+class HookGame:
+
+    def __init__(self, frame_class = FishingFrame, hook_class = Hook):
+        self.frame = frame_class(0, 0)
+        self.hook = hook_class(self.frame)
+
+        # Last update events, for the front-end: mode changed, and fish
+        # caught or not when SPACE was pressed in Dredge mode
+        self.mode_changed = False
+        self.catch = None
+
+
+    def set_mode(self, mode):
+        # Swap fishing mode, the hook starts again from the center
+        if self.hook.fishing_mode == mode:
+            return False
+        self.hook.fishing_mode = mode
+        self.hook.center_hook()
+        return True
+
+
+    def update(self, dredge = False, stardew = False, press = False):
+        # Fishing modes swap
+        if dredge:
+            self.mode_changed = self.set_mode(FishingModes.DREDGE)
+        elif stardew:
+            self.mode_changed = self.set_mode(FishingModes.STARDEW)
+        else:
+            self.mode_changed = False
+
+        # Move the hook (SPACE flaps in Stardew mode)
+        self.hook.move(flap = press)
+
+        # Press SPACE to fish
+        self.catch = self.hook.fish() if press else None
+
+
+
+def new_game(frame_class = FishingFrame, hook_class = Hook):
+    # Fresh game state (front-end subclasses may add a draw method)
+    return HookGame(frame_class, hook_class)
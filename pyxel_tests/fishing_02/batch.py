@@ -0,0 +1,175 @@
+# ======================================================================
+# FISHING MINI-GAME - BATCH SIMULATION
+# ======================================================================
+# Runs N fishing sessions side by side with NumPy arrays.
+# Same physics as minigame.FishCursor / Pattern / FishingMiniGame, but
+# one step() advances every session at once. fixed = True runs the cursor
+# on fixed-point integers, like minigame.FixedFishCursor.
+
+import numpy as np
+
+from patterns import COMPILED_PATTERNS
+from minigame import FishingMiniGame, DISTANCE_START, FIXED_SCALE, to_fixed
+
+
+
+# Session status codes (same order as minigame.FishingStatus)
+ONGOING = 0
+SUCCESS = 1
+FAILURE = 2
+ABORT = 3
+
+
+
+# Every compiled pattern in a flat list, E_01 … H_03
+ALL_PATTERNS = tuple(
+    compiled
+    for patterns in COMPILED_PATTERNS.values()
+    for compiled in patterns
+)
+
+# Pattern id by name, for the batch speed table
+PATTERN_IDS = {compiled.name: i for i, compiled in enumerate(ALL_PATTERNS)}
+
+# One row of per-pixel speeds per pattern
+SPEED_TABLE = np.array([compiled.speeds for compiled in ALL_PATTERNS])
+
+
+
+class BatchFishing:
+    def __init__(self, n, distance, patterns, fixed = False):
+
+        # Take frame and cursor constants from a reference session
+        reference = FishingMiniGame(distance = 1, difficulty = 'easy', pattern = 0)
+        frame = reference.frame
+        cursor = reference.cursor
+
+        self.n = n
+        self.xmin = frame.xmin
+        self.xmax = frame.xmax
+        self.size = cursor.size
+        self.acceleration = cursor.acceleration
+        self.deceleration = cursor.deceleration
+        self.max_velocity = cursor.max_velocity
+        self.bounce = cursor.bounce
+
+        # Pattern per session: a pattern name, or an array of pattern ids
+        if isinstance(patterns, str):
+            patterns = PATTERN_IDS[patterns]
+        self.patterns = np.broadcast_to(np.asarray(patterns, dtype = np.intp), (n,)).copy()
+        self.width = SPEED_TABLE.shape[1]
+
+        # Session state
+        self.x = np.full(n, cursor.x, dtype = np.float64)
+        self.velocity = np.zeros(n, dtype = np.float64)
+
+        # Fixed-point cursor state and constants (x and velocity are then
+        # their float values)
+        self.fixed = fixed
+        if fixed:
+            self.x_fixed = np.full(n, to_fixed(cursor.x), dtype = np.int64)
+            self.velocity_fixed = np.zeros(n, dtype = np.int64)
+            self.constants_fixed = [
+                to_fixed(value) for value in (
+                    self.acceleration, self.deceleration, self.max_velocity, self.bounce,
+                    self.xmin + 1, self.xmax - self.size - 1
+                )
+            ]
+        self.speed = np.full(n, reference.pattern.speed, dtype = np.int64)
+        # Distances as given (lake fish depths are floats, like in the
+        # single-session game)
+        self.distance_max = np.broadcast_to(np.asarray(distance, dtype = np.float64), (n,)).copy()
+        self.distance_current = np.full(n, DISTANCE_START, dtype = np.int64)
+        self.status = np.full(n, ONGOING, dtype = np.int8)
+
+        # Tick at which each session ended (0 while ongoing)
+        self.ticks = 0
+        self.end_tick = np.zeros(n, dtype = np.int64)
+
+
+    def step(self, pull, abort = None):
+        self.ticks += 1
+        pull = np.broadcast_to(pull, (self.n,))
+
+        # ===== FishCursor.move =====
+        if self.fixed:
+            self.move_fixed(pull)
+        else:
+            self.move(pull)
+
+        # ===== Pattern.update =====
+        offset = self.x + self.size / 2 - self.xmin
+        inside = (offset >= 0) & (offset < self.width)
+        pixel = np.clip(offset, 0, self.width - 1).astype(np.intp)
+        np.copyto(self.speed, SPEED_TABLE[self.patterns, pixel], where = inside)
+
+        # ===== FishingMiniGame.update =====
+        self.distance_current += self.speed
+
+        ongoing = self.status == ONGOING
+        success = ongoing & (self.distance_current >= self.distance_max)
+        failure = ongoing & ~success & (self.distance_current < 0)
+        self.status[success] = SUCCESS
+        self.status[failure] = FAILURE
+        ended = success | failure
+
+        if abort is not None:
+            aborted = ongoing & ~ended & np.broadcast_to(abort, (self.n,))
+            self.status[aborted] = ABORT
+            ended |= aborted
+
+        self.end_tick[ended] = self.ticks
+
+
+    def move(self, pull):
+        # FishCursor.move on every session
+        velocity = self.velocity
+        accelerate = np.where(
+            pull,
+            velocity < self.max_velocity,
+            velocity > -self.max_velocity
+        )
+        velocity += np.where(
+            accelerate,
+            np.where(pull, self.deceleration, -self.acceleration),
+            0.0
+        )
+
+        # Bounce on the sides, otherwise move
+        target_position = self.x + velocity
+        hit = (
+            (target_position >= self.xmax - self.size - 1)
+            | (target_position <= self.xmin + 1)
+        )
+        velocity[hit] *= -self.bounce
+        np.copyto(self.x, target_position, where = ~hit)
+
+
+    def move_fixed(self, pull):
+        # Same moves on integers, bounces rounded toward 0
+        acceleration, deceleration, max_velocity, bounce, left, right = self.constants_fixed
+        velocity = self.velocity_fixed
+        accelerate = np.where(pull, velocity < max_velocity, velocity > -max_velocity)
+        velocity += np.where(accelerate, np.where(pull, deceleration, -acceleration), 0)
+
+        target_position = self.x_fixed + velocity
+        hit = (target_position >= right) | (target_position <= left)
+        bounced = np.abs(velocity[hit]) * bounce // FIXED_SCALE
+        velocity[hit] = np.where(velocity[hit] >= 0, -bounced, bounced)
+        np.copyto(self.x_fixed, target_position, where = ~hit)
+
+        np.divide(self.x_fixed, FIXED_SCALE, out = self.x)
+        np.divide(velocity, FIXED_SCALE, out = self.velocity)
+
+
+    def done(self):
+        return not (self.status == ONGOING).any()
+
+
+    def run(self, policy, max_ticks):
+        # Step with policy(batch) -> array of pulls until every session
+        # ended or max_ticks is reached
+        while self.ticks < max_ticks and not self.done():
+            self.step(policy(self))
+
+        return self
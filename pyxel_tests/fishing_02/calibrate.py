@@ -0,0 +1,327 @@
+# ======================================================================
+# FISHING MINI-GAME - DIFFICULTY CALIBRATION
+# ======================================================================
+# Monte Carlo runs of every pattern with a few input policies, spread
+# over all cores. Each worker steps a chunk of sessions with the batch
+# simulator and sends back its counts, the main process merges them.
+#
+# Usage (from fishing_02/):
+#   python calibrate.py
+#   python calibrate.py --sessions 1000000 --policies greedy hold
+#   python calibrate.py --patterns H_03 R_01 --json results.json
+#   python calibrate.py --patterns H_01 --check-fixed 1000 --distance 400
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch import BatchFishing, ALL_PATTERNS, PATTERN_IDS, ONGOING, SUCCESS, FAILURE, ABORT
+from minigame import FishCursor, FixedFishingMiniGame
+from patterns import COMPILED_PATTERNS
+
+
+
+# Frames per second of the pyxel app, to show times in seconds
+FPS = 30
+
+# Default session settings (same depth as the App)
+DISTANCE = 300
+MAX_TICKS = FPS * 60
+
+# Sessions simulated by one worker task
+CHUNK_SIZE = 20000
+
+# Largest cursor gap (pixels) allowed between float and fixed-point physics
+FIXED_TOLERANCE = 1.0
+
+
+
+# ======================================================================
+# INPUT POLICIES
+# ======================================================================
+# A policy is built for a batch and returns, each tick, which sessions
+# hold SPACE.
+
+def random_tapping(batch, rng, options):
+    # Press SPACE at random, half of the time
+    def policy(batch):
+        return rng.random(batch.n) < 0.5
+    return policy
+
+
+def hold_ratio(batch, rng, options):
+    # Hold SPACE for a fixed part of each period, with a random phase
+    period = options['period']
+    hold = options['ratio'] * period
+    phase = rng.integers(0, period, batch.n)
+
+    def policy(batch):
+        return (batch.ticks + phase) % period < hold
+    return policy
+
+
+def greedy(batch, rng, options):
+    # Steer the cursor towards the center of the fastest zone, taking the
+    # current velocity into account
+    target = FASTEST_ZONE[batch.patterns] + batch.xmin
+    lookahead = options['lookahead']
+
+    def policy(batch):
+        center = batch.x + batch.size / 2
+        return center + batch.velocity * lookahead < target
+    return policy
+
+
+POLICIES = {
+    'random': random_tapping,
+    'hold': hold_ratio,
+    'greedy': greedy
+}
+
+
+
+def fastest_zone(compiled):
+    # Center of the widest section with the best speed, from frame xmin
+    best = max(compiled.speeds)
+    sections = [s for s in compiled.sections if compiled.speeds[s[1]] == best]
+    type, x, width = max(sections, key = lambda s: s[2])
+    return x + width / 2
+
+
+FASTEST_ZONE = np.array([fastest_zone(compiled) for compiled in ALL_PATTERNS])
+
+
+
+# ======================================================================
+# SIMULATION
+# ======================================================================
+
+def simulate(task):
+    # Run one chunk of sessions, return counts and sums for the stats
+    pattern, policy, n, seed, distance, max_ticks, options = task
+
+    rng = np.random.default_rng(seed)
+    batch = BatchFishing(n, distance, pattern, fixed = options.get('fixed', False))
+    batch.run(POLICIES[policy](batch, rng, options), max_ticks)
+
+    stats = {'pattern': pattern, 'policy': policy, 'sessions': n}
+    for name, code in (('success', SUCCESS), ('failure', FAILURE), ('abort', ABORT)):
+        ticks = batch.end_tick[batch.status == code].astype(np.float64)
+        stats[name] = len(ticks)
+        stats[name + '_ticks'] = ticks.sum()
+        stats[name + '_ticks2'] = (ticks * ticks).sum()
+    return stats
+
+
+def merge(results):
+    # Merge chunk results by (pattern, policy)
+    merged = {}
+    for stats in results:
+        key = (stats['pattern'], stats['policy'])
+        if key not in merged:
+            merged[key] = dict(stats)
+        else:
+            for name, value in stats.items():
+                if name not in ('pattern', 'policy'):
+                    merged[key][name] += value
+    return merged
+
+
+def summarize(stats):
+    n = stats['sessions']
+    summary = {
+        'pattern': stats['pattern'],
+        'policy': stats['policy'],
+        'sessions': n,
+        'success_rate': stats['success'] / n,
+        'failure_rate': stats['failure'] / n,
+        'timeout_rate': (n - stats['success'] - stats['failure'] - stats['abort']) / n
+    }
+
+    # Mean and variance of the time to finish, per outcome (None without
+    # any session of that outcome, JSON has no NaN)
+    for name in ('success', 'failure'):
+        count = stats[name]
+        if count:
+            mean = stats[name + '_ticks'] / count
+            variance = max(stats[name + '_ticks2'] / count - mean * mean, 0.0)
+        else:
+            mean = variance = None
+        summary[name + '_ticks_mean'] = mean
+        summary[name + '_ticks_var'] = variance
+
+    return summary
+
+
+def calibrate(patterns, policies, sessions, distance, max_ticks, options,
+              workers = None, seed = 0, chunk_size = CHUNK_SIZE):
+    # Split every (pattern, policy) pair into chunks with their own seed
+    tasks = []
+    seeds = np.random.SeedSequence(seed)
+    for pattern in patterns:
+        for policy in policies:
+            for start in range(0, sessions, chunk_size):
+                n = min(chunk_size, sessions - start)
+                tasks.append((
+                    pattern, policy, n, seeds.spawn(1)[0],
+                    distance, max_ticks, options
+                ))
+
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        merged = merge(pool.map(simulate, tasks))
+
+    return [
+        summarize(merged[(pattern, policy)])
+        for pattern in patterns
+        for policy in policies
+    ]
+
+
+
+# ======================================================================
+# FIXED-POINT CHECK
+# ======================================================================
+# Float and fixed-point cursors fed the same random inputs. Each move must
+# land within FIXED_TOLERANCE pixels of the other physics: before every
+# tick the float cursor restarts from the fixed-point one, one session at
+# a time (minigame) and in the batch simulator.
+#
+# Over a whole session the two drift apart: a velocity or position equal
+# to a limit in fixed-point is a hair above or below it in floats, so one
+# cursor bounces (or stops accelerating) a tick before the other, and the
+# gap grows from there. The session gap and the sessions ending
+# differently are reported, not checked.
+
+def check_fixed(pattern, sessions, distance, max_ticks, seed):
+    # Largest gap of a move, largest gap over a session, sessions ending
+    # differently
+    compiled = ALL_PATTERNS[PATTERN_IDS[pattern]]
+    difficulty = compiled.difficulty
+    index = COMPILED_PATTERNS[difficulty].index(compiled)
+    pulls = np.random.default_rng(seed).random((sessions, max_ticks)) < 0.5
+
+    tick_gap = 0.0
+    for inputs in pulls.tolist():
+        fixed = FixedFishingMiniGame(distance, difficulty, index).cursor
+        cursor = FishCursor(fixed.frame)
+        for pull in inputs:
+            cursor.x = fixed.x
+            cursor.velocity = fixed.velocity
+            cursor.move(pull)
+            fixed.move(pull)
+            tick_gap = max(tick_gap, abs(cursor.x - fixed.x))
+
+    # Batch simulator: one move from the same state, then whole sessions
+    restarted, floating, fixed = [
+        BatchFishing(sessions, distance, pattern, fixed = is_fixed)
+        for is_fixed in (False, False, True)
+    ]
+    session_gap = 0.0
+    for tick in range(max_ticks):
+        ongoing = (floating.status == ONGOING) | (fixed.status == ONGOING)
+        if not ongoing.any():
+            break
+        restarted.x[:] = fixed.x
+        restarted.velocity[:] = fixed.velocity
+        for batch in (restarted, floating, fixed):
+            batch.step(pulls[:, tick])
+        tick_gap = max(tick_gap, np.abs(restarted.x - fixed.x).max())
+        session_gap = max(session_gap, np.abs(floating.x - fixed.x)[ongoing].max())
+
+    mismatches = np.count_nonzero(
+        (floating.status != fixed.status) | (floating.end_tick != fixed.end_tick)
+    )
+    return tick_gap, session_gap, mismatches
+
+
+
+# ======================================================================
+# COMMAND LINE
+# ======================================================================
+
+def sd(variance):
+    return None if variance is None else variance ** 0.5
+
+
+def seconds(ticks, width):
+    return f"{'-':>{width}}" if ticks is None else f"{ticks / FPS:>{width}.2f}"
+
+
+def print_report(summaries):
+    print(
+        f"{'pattern':<8} {'policy':<8} {'sessions':>9} "
+        f"{'success':>8} {'failure':>8} {'timeout':>8} "
+        f"{'win (s)':>8} {'win sd':>7} {'lose (s)':>8} {'lose sd':>7}"
+    )
+    for s in summaries:
+        print(
+            f"{s['pattern']:<8} {s['policy']:<8} {s['sessions']:>9} "
+            f"{s['success_rate']:>8.1%} {s['failure_rate']:>8.1%} {s['timeout_rate']:>8.1%} "
+            f"{seconds(s['success_ticks_mean'], 8)} {seconds(sd(s['success_ticks_var']), 7)} "
+            f"{seconds(s['failure_ticks_mean'], 8)} {seconds(sd(s['failure_ticks_var']), 7)}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Fishing patterns difficulty calibration")
+    parser.add_argument('--patterns', nargs = '+', default = list(PATTERN_IDS), choices = list(PATTERN_IDS))
+    parser.add_argument('--policies', nargs = '+', default = list(POLICIES), choices = list(POLICIES))
+    parser.add_argument('--sessions', type = int, default = 100000, help = "sessions per pattern and policy")
+    parser.add_argument('--distance', type = int, default = DISTANCE)
+    parser.add_argument('--max-ticks', type = int, default = MAX_TICKS)
+    parser.add_argument('--hold-ratio', type = float, default = 0.35)
+    parser.add_argument('--hold-period', type = int, default = 12)
+    parser.add_argument('--lookahead', type = float, default = 6.0)
+    parser.add_argument('--fixed', action = 'store_true', help = "fixed-point cursor physics")
+    parser.add_argument('--check-fixed', type = int, metavar = 'SESSIONS',
+                        help = "compare float and fixed-point moves on random sessions, per pattern")
+    parser.add_argument('--workers', type = int, default = os.cpu_count())
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--json', help = "also write the results to this file")
+    args = parser.parse_args()
+
+    if args.check_fixed:
+        failed = False
+        print(f"{'pattern':<8} {'move gap':>10} {'session gap':>12} {'different ends':>15}")
+        for pattern in args.patterns:
+            tick_gap, session_gap, mismatches = check_fixed(
+                pattern, args.check_fixed, args.distance, args.max_ticks, args.seed
+            )
+            ok = tick_gap <= FIXED_TOLERANCE
+            failed |= not ok
+            print(
+                f"{pattern:<8} {tick_gap:>8.2g}px {session_gap:>10.2g}px {mismatches:>15} "
+                f"{'ok' if ok else 'FAILED'}"
+            )
+        sys.exit(1 if failed else 0)
+
+    options = {
+        'ratio': args.hold_ratio,
+        'period': args.hold_period,
+        'lookahead': args.lookahead,
+        'fixed': args.fixed
+    }
+    summaries = calibrate(
+        patterns = args.patterns,
+        policies = args.policies,
+        sessions = args.sessions,
+        distance = args.distance,
+        max_ticks = args.max_ticks,
+        options = options,
+        workers = args.workers,
+        seed = args.seed
+    )
+
+    print_report(summaries)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': summaries}, f, indent = 2, allow_nan = False)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,224 +1,91 @@
-import pyxel
-from enum import Enum
-from random import randrange
-
-
-
-# App level constants
-TILE_SIZE = 8
-SCREEN_HEIGHT = 160
-SCREEN_WIDTH = 240
-
-# Module level constants
-Y = TILE_SIZE * 4
-
-
-
-# Fishing status
-class FishingStatus(Enum):
-    ONGOING = 'ongoing'
-    SUCCESS = 'success'
-    FAILURE = 'failure'
-    ABORT = 'abort'
-
+import os
+import sys
 
+import pyxel
+import random
 
-# Fishing mini-game patterns (12 slots inside the current frame)
-### Easy
-E_01 = [
-    ['slow', 1],
-    ['medium', 2],
-    ['fast', 6],
-    ['medium', 2],
-    ['slow', 1]
-]
-E_02 = [
-    ['slow', 1],
-    ['medium', 4],
-    ['fast', 5],
-    ['medium', 1],
-    ['slow', 1]
-]
-E_03 = [
-    ['slow', 1],
-    ['medium', 1],
-    ['fast', 5],
-    ['medium', 4],
-    ['slow', 1]
-]
+# Shared pyxel_tests modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import assets
+from common.loop import FixedTimestep
 
-### Regular
-R_01 = [
-    ['slow', 2],
-    ['medium', 2],
-    ['fast', 4],
-    ['medium', 2],
-    ['slow', 2]
-]
-R_02 = [
-    ['slow', 1],
-    ['medium', 1],
-    ['fast', 4],
-    ['medium', 3],
-    ['slow', 3]
-]
-R_03 = [
-    ['slow', 3],
-    ['medium', 3],
-    ['fast', 4],
-    ['medium', 1],
-    ['slow', 1]
-]
+import minigame
+from minigame import SCREEN_HEIGHT, SCREEN_WIDTH, TILE_SIZE
+from trip import new_game
 
-### Hard
-H_01 = [
-    ['slow', 3],
-    ['medium', 1],
-    ['fast', 1],
-    ['medium', 2],
-    ['fast', 2],
-    ['medium', 1],
-    ['slow', 2]
-]
-H_02 = [
-    ['slow', 2],
-    ['medium', 1],
-    ['fast', 2],
-    ['medium', 2],
-    ['fast', 1],
-    ['medium', 1],
-    ['slow', 3]
-]
-H_03 = [
-    ['slow', 1],
-    ['medium', 1],
-    ['fast', 2],
-    ['medium', 1],
-    ['slow', 3],
-    ['medium', 1],
-    ['fast', 1],
-    ['medium', 1],
-    ['slow', 1]
-]
 
 
+# Offset of the distance bar above the frame
+BAR_Y = 7
+BAR_HEIGHT = 4
 
-# Store fishing mini-game patterns and speeds by difficulty
-PATTERNS = {
-    'easy': {
-        'speeds': { 'slow': -2, 'medium': 1, 'fast': 3 },
-        'patterns': [E_01, E_02, E_03]
-    },
-    'regular': {
-        'speeds': { 'slow': -2, 'medium': 1, 'fast': 3 },
-        'patterns': [R_01, R_02, R_03]
-    },
-    'hard': {
-        'speeds': { 'slow': -2, 'medium': 1, 'fast': 3 },
-        'patterns': [H_01, H_02, H_03]
-    }
-}
+# Cursor physics on fixed-point integers (minigame.FixedFishingMiniGame),
+# the same sessions on every machine
+FIXED_POINT = False
 
 
 
-class Frame:
-    def __init__(self):
-        
-        # Frame dimensions
-        self.size = TILE_SIZE * 12
-        self.xmin = SCREEN_WIDTH / 2 - self.size / 2
-        self.xmax = self.xmin + self.size
-        self.y = Y
-    
+class StaticLayer:
+    # Pattern strip, frame border and distance bar border never change
+    # during a session: render them once in a spare image bank, then draw
+    # them with a single blt per frame
     
-    def draw(self):
-        pyxel.rectb(
-            x = self.xmin,
-            y = Y,
-            w = self.size,
-            h = TILE_SIZE,
-            col = 9
-        )
-
-
-
-class FishCursor:
-    def __init__(self, frame):
-        
-        # Related objects
-        self.frame = frame
+    def __init__(self, img):
         
-        # Cursor dimensions
-        self.size = TILE_SIZE
-        self.x = SCREEN_WIDTH / 2 - self.size / 2
-        self.y = Y
+        # Spare image bank used as cache
+        self.img = img
         
-        # Cursor movement
-        self.velocity = 0
-        self.acceleration = 0.1
-        self.deceleration = 0.2
-        self.max_velocity = 6.0
-        self.bounce = 0.6
+        # Pattern currently rendered in the cache
+        self.key = None
     
     
-    def move(self):
-        # Accelerate to right when SPACE is pressed
-        if pyxel.btn(pyxel.KEY_SPACE):
-            
-            # If speed < max, accelerate
-            if self.velocity < self.max_velocity:
-                self.velocity += self.deceleration
-            
-        # Accelerate to left when key is released
-        else:
-            
-            # If speed < max, accelerate
-            if self.velocity > -self.max_velocity:
-                self.velocity -= self.acceleration
+    def invalidate(self):
+        self.key = None
+    
+    
+    def render(self, game):
+        image = pyxel.images[self.img]
         
-        # Calculate next position
-        target_position = self.x + self.velocity
+        # Clear the cache area (0 is transparent when drawn)
+        image.rect(0, 0, game.frame.size, BAR_Y + TILE_SIZE, 0)
         
-        # If we hit the sides, bounce
-        if target_position >= self.frame.xmax - self.size - 1:
-            self.velocity *= -self.bounce
-        elif target_position <= self.frame.xmin + 1:
-            self.velocity *= -self.bounce
-        else:
-            self.x = target_position
+        # Pattern sections
+        for type, x, width in game.pattern.compiled.sections:
+            image.rect(x, BAR_Y, width, TILE_SIZE, game.pattern_color(type))
+        
+        # Frame
+        image.rectb(0, BAR_Y, game.frame.size, TILE_SIZE, 9)
         
+        # Distance bar - frame
+        image.rectb(0, 0, game.frame.size, BAR_HEIGHT, 3)
     
     
-    def draw(self):
+    def draw(self, game):
+        
+        # Render again only if the pattern or difficulty changed
+        key = (game.pattern.pattern_difficulty, game.pattern.pattern)
+        if key != self.key:
+            self.render(game)
+            self.key = key
+        
         pyxel.blt(
-            x = self.x,
-            y = self.y,
-            img = 0,
-            u = TILE_SIZE,
+            x = game.frame.xmin,
+            y = game.frame.y - BAR_Y,
+            img = self.img,
+            u = 0,
             v = 0,
-            w = self.size,
-            h = TILE_SIZE,
+            w = game.frame.size,
+            h = BAR_Y + TILE_SIZE,
             colkey = 0
         )
 
 
 
-class Pattern:
-    def __init__(self, frame, cursor, difficulty):
-        
-        # Frame dimensions
-        self.frame = frame
-        
-        # Related cursor
-        self.cursor = cursor
-        
-        # Pattern to use
-        self.pattern_difficulty = difficulty        
-        self.pattern = self.pick_a_pattern(difficulty)
-        
-        # Speed
-        self.speed = 1
+class FishingMiniGame(minigame.FixedFishingMiniGame if FIXED_POINT else minigame.FishingMiniGame):
+    # Pyxel front-end of the simulation core: reads the keyboard and draws
     
+    # Static layers cache, shared by every session
+    static_layer = StaticLayer(img = 2)
     
     def pattern_color(self, type):
         if type == 'slow': 
@@ -231,138 +98,26 @@ class Pattern:
             return 0
     
     
-    def pick_a_pattern(self, difficulty):
-        # Get number of patterns available
-        n_patterns = len(PATTERNS[difficulty]['patterns'])
-        
-        # Get random pattern between 0 and max number of patterns available
-        pattern = randrange(0, n_patterns)       
-        return pattern
-
-
-    def update(self):
-        # ===== Get speed at which we close the distance to the surface: =====
-        # Get cursor center position
-        cursor_center = self.cursor.x + (self.cursor.size / 2)
-        
-        # Get cursor speed from pattern
-        pattern = PATTERNS[self.pattern_difficulty]['patterns'][self.pattern]
-        
-        # Find cursor position
-        xmin = self.frame.xmin
-        
-        # Speed found?
-        speed_found = False
-        
-        for p in pattern:
-            if not speed_found:
-                width = p[1] * TILE_SIZE
-                xmax = xmin + width
-                
-                # Is the cursor between xmin and xmax?
-                if cursor_center >= xmin and cursor_center < xmax:
-                    speed_smf = p[0]
-                    speed = PATTERNS[self.pattern_difficulty]['speeds'][speed_smf]
-                    self.speed = speed
-                    speed_found = True
-                
-                else:
-                    xmin += width
-    
-    
-    def draw(self):
-        
-        # Retrieve pattern to draw
-        pattern = PATTERNS[self.pattern_difficulty]['patterns'][self.pattern]
-        x = self.frame.xmin
-        
-        # Draw pattern sections
-        for p in pattern:
-            type = p[0]
-            width = p[1] * TILE_SIZE
-            
-            pyxel.rect(
-                x = x,
-                y = self.frame.y,
-                w = width,
-                h = TILE_SIZE,
-                col = self.pattern_color(type)
-            )
-            
-            x += width
-
-        
-        
-class FishingMiniGame:
-    def __init__(self, distance, difficulty):
-                
-        # Related objects
-        self.frame = Frame()
-        self.cursor = FishCursor(frame = self.frame)
-        self.pattern = Pattern(
-            frame = self.frame,
-            cursor = self.cursor,
-            difficulty = difficulty
-            )
-        
-        # Dimensions
-        self.width = self.frame.size
-        
-        # Distance bar progress
-        self.distance_max = distance
-        self.distance_current = 40
-        self.distance_speed = 1
-        
-        # Fishing mini-game events
-        self.status = FishingStatus.ONGOING
-    
+    def draw_cursor(self):
+        pyxel.blt(
+            x = self.cursor.x,
+            y = self.cursor.y,
+            img = 0,
+            u = TILE_SIZE,
+            v = 0,
+            w = self.cursor.size,
+            h = TILE_SIZE,
+            colkey = 0
+        )
     
-    def update(self):
-        
-        # If fishing is ongoing, animate cursor
-        self.cursor.move()
-        
-        # Get speed from pattern
-        self.pattern.update()
-        
-        # Get current distance cursor speed
-        self.distance_speed = self.pattern.speed
-        # print(f"Speed: {self.pattern.speed} || Speed px: {self.distance_speed}")
-        
-        # Close distance to the surface
-        self.distance_current += self.distance_speed
-        
-        # Handle success and failure
-        if self.status == FishingStatus.ONGOING:
-            if self.distance_current >= self.distance_max: # SUCCESS
-                self.status = FishingStatus.SUCCESS
-                
-            elif self.distance_current < 0: # FAILURE
-                self.status = FishingStatus.FAILURE
-            
-            elif pyxel.btnp(pyxel.KEY_BACKSPACE): # ABORT
-                self.status = FishingStatus.ABORT
-
     
     def draw(self):
                
-        # Draw pattern
-        self.pattern.draw()
-        
-        # Draw frame
-        self.frame.draw()
+        # Draw pattern, frame and distance bar frame
+        self.static_layer.draw(self)
         
         # If fishing is ongoing, animate cursor
-        self.cursor.draw()
-        
-        # Draw distance bar - frame
-        pyxel.rectb(
-            x = self.frame.xmin,
-            y = self.frame.y - 7,
-            w = self.frame.size,
-            h = 4,
-            col = 3
-        )
+        self.draw_cursor()
         
         # Draw distance bar - fill
         current_width = int(self.distance_current * self.width / self.distance_max)
@@ -373,20 +128,14 @@ class FishingMiniGame:
         
         pyxel.rect(
             x = self.frame.xmin,
-            y = self.frame.y - 7,
+            y = self.frame.y - BAR_Y,
             w = width,
-            h = 4,
+            h = BAR_HEIGHT,
             col = 3
         )
 
 
 
-class Fish:
-    def __init__(self, difficulty):
-        self.difficulty = difficulty
-
-
-
 class App:
     def __init__(self):
         
@@ -397,56 +146,36 @@ class App:
             title = "Fishing 03"
         )
         
-        # Load resources
-        pyxel.load("resources.pyxres")
+        # Load resources (only the sprites bank, image 2 is the static
+        # layers cache)
+        assets.load(pyxel, "resources.pyxres", images = (0,), tilemaps = ())
+        FishingMiniGame.static_layer.invalidate()
         
         # --------- FISHING GAME -----------
-        # Hook depth
-        self.depth = 300
-        
-        # Add fish to the game
-        self.fish = Fish('regular')
-        
-        # Init fishing mini-game prop
-        self.fishing = False
-        
-        # Show mini-game related message
-        self.message = False
+        # Lake, casts and sessions (no pyxel in there), random generator
+        # seeded from the global random state (the replay layer seeds it
+        # to pick the same patterns again)
+        self.trip = new_game(
+            game_class = FishingMiniGame,
+            rng = random.Random(random.getrandbits(64))
+        )
         # ----------------------------------
         
-        # Run game
-        pyxel.run(self.update, self.draw)
+        # Run game at a fixed tick rate (sessions come and go, the cursor
+        # is drawn at its tick position)
+        self.loop = FixedTimestep(pyxel, self.update, self.draw)
+        self.loop.run()
     
     
     def update(self):
         
-        # Press SPACE to start fishing
-        if pyxel.btnp(pyxel.KEY_SPACE) and not self.fishing:
-            
-            # Create fishing minigame
-            self.fishing = FishingMiniGame(self.depth, self.fish.difficulty)
-        
-        # If we are fishing, run the mini_game until it returns success or failure
-        if self.fishing:
-            
-            # Run minigame
-            self.fishing.update()
-            
-            # Do something on success
-            if self.fishing.status == FishingStatus.SUCCESS:
-                self.message = "Well done, you caught the fish"
-                self.fishing = False
-            
-            # Do something on failure
-            elif self.fishing.status == FishingStatus.FAILURE:
-                self.message = "The fish is gone with your bait"
-                self.fishing = False
-            
-            # Do something on abort fishing
-            elif self.fishing.status == FishingStatus.ABORT:
-                self.message = "You let the fish go with your bait"
-                self.fishing = False
-            
+        # Press SPACE to cast the hook, then to reel the fish in
+        self.trip.update(
+            cast = pyxel.btnp(pyxel.KEY_SPACE),
+            pull = pyxel.btn(pyxel.KEY_SPACE),
+            abort = pyxel.btnp(pyxel.KEY_BACKSPACE)
+        )
+
 
 
     def draw(self):
@@ -455,8 +184,9 @@ class App:
         pyxel.cls(0)
         
         # Draw depending on if we are fishing or not
-        if self.fishing:
-            self.fishing.draw()
+        trip = self.trip
+        if trip.fishing:
+            trip.fishing.draw()
             pyxel.text(
                 x = TILE_SIZE * 8,
                 y = TILE_SIZE * 16,
@@ -464,11 +194,11 @@ class App:
                 col = 7
             )
         
-        elif self.message:
+        elif trip.message:
             pyxel.text(
                 x = TILE_SIZE * 8,
                 y = TILE_SIZE * 15,
-                s = self.message,
+                s = trip.message,
                 col = 7
             )
             
@@ -486,7 +216,8 @@ class App:
                 s = "Press SPACE to start fishing",
                 col = 7
             )
-        
 
 
-App()
\ No newline at end of file
+
+if __name__ == '__main__':
+    App()
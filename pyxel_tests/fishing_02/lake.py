@@ -0,0 +1,182 @@
+# ======================================================================
+# LAKE - FISH POPULATION
+# ======================================================================
+# The fish of a lake, each with a position along the shore, a depth, a
+# species and the difficulty of its mini-game. Fish are kept in a uniform
+# grid of (x, depth) cells: the fish biting a cast hook is found by
+# searching the cells around the hook, nearest rings first, so a lake of
+# thousands of fish costs a few cells per cast. No pyxel call in here.
+
+from collections import namedtuple
+from random import Random
+
+
+
+# Lake dimensions (same unit as the mini-game distance)
+LAKE_WIDTH = 2000
+LAKE_DEPTH = 600
+
+# Grid cells size
+CELL_SIZE = 50
+
+# Fish farther than this from the hook do not bite
+BITE_RADIUS = 150
+
+# Species: mini-game difficulty, depth range and share of the population
+Species = namedtuple('Species', ['name', 'difficulty', 'depth_min', 'depth_max', 'weight'])
+
+SPECIES = (
+    Species('perch', 'easy', 60, 220, 5),
+    Species('trout', 'regular', 150, 400, 3),
+    Species('pike', 'regular', 100, 350, 2),
+    Species('catfish', 'hard', 350, 600, 1)
+)
+
+
+
+class Fish:
+    __slots__ = ('x', 'depth', 'species', 'difficulty', 'cell')
+
+    def __init__(self, x, depth, species):
+        self.x = x
+        self.depth = depth
+        self.species = species
+        self.difficulty = species.difficulty
+
+        # Grid cell, set by the lake
+        self.cell = None
+
+
+
+class Lake:
+    def __init__(self, width = LAKE_WIDTH, depth = LAKE_DEPTH, cell_size = CELL_SIZE):
+
+        # Dimensions
+        self.width = width
+        self.depth = depth
+        self.cell_size = cell_size
+
+        # Grid of cells, row by row (one row per depth band), each cell a
+        # list of fish
+        self.columns = max(1, -(-width // cell_size))
+        self.rows = max(1, -(-depth // cell_size))
+        self.cells = [[] for _ in range(self.columns * self.rows)]
+
+        self.count = 0
+
+
+    def cell_position(self, x, depth):
+        # Column and row of a position, clamped inside the lake
+        column = min(max(int(x // self.cell_size), 0), self.columns - 1)
+        row = min(max(int(depth // self.cell_size), 0), self.rows - 1)
+        return column, row
+
+
+    # ==================================================================
+    # POPULATION
+    # ==================================================================
+
+    def add(self, fish):
+        column, row = self.cell_position(fish.x, fish.depth)
+        fish.cell = row * self.columns + column
+        self.cells[fish.cell].append(fish)
+        self.count += 1
+
+
+    def remove(self, fish):
+        # Swap the fish with the last one of its cell, then drop it
+        cell = self.cells[fish.cell]
+        index = cell.index(fish)
+        cell[index] = cell[-1]
+        cell.pop()
+        fish.cell = None
+        self.count -= 1
+
+
+    def populate(self, count, rng = None, species = SPECIES):
+        # Random fish, species by weight, depth inside the species range
+        rng = rng if rng is not None else Random()
+        weights = [s.weight for s in species]
+
+        for s in rng.choices(species, weights, k = count):
+            x = rng.uniform(0, self.width)
+            depth = rng.uniform(s.depth_min, min(s.depth_max, self.depth))
+            self.add(Fish(x, depth, s))
+
+
+    # ==================================================================
+    # QUERIES
+    # ==================================================================
+
+    def nearest(self, x, depth, radius = BITE_RADIUS, eligible = None):
+        # Nearest fish around the hook (eligible(fish) filters them), or
+        # None if none is inside the radius
+        size = self.cell_size
+        column, row = self.cell_position(x, depth)
+        best = None
+        best_distance = radius * radius
+
+        # Rings of cells around the hook cell, until the next ring is
+        # farther than the best fish or the radius
+        ring = 0
+        max_ring = max(self.columns, self.rows)
+        while ring <= max_ring:
+            ring_distance = max(ring - 1, 0) * size
+            if ring_distance * ring_distance > best_distance:
+                break
+
+            for c, r in self.ring_cells(column, row, ring):
+                for fish in self.cells[r * self.columns + c]:
+                    dx = fish.x - x
+                    dy = fish.depth - depth
+                    distance = dx * dx + dy * dy
+                    if distance <= best_distance and (eligible is None or eligible(fish)):
+                        best = fish
+                        best_distance = distance
+
+            ring += 1
+
+        return best
+
+
+    def ring_cells(self, column, row, ring):
+        # Cells at exactly `ring` cells from (column, row), inside the lake
+        if ring == 0:
+            yield column, row
+            return
+
+        c_min = column - ring
+        c_max = column + ring
+        r_min = row - ring
+        r_max = row + ring
+
+        # Top and bottom rows of the ring
+        for c in range(max(c_min, 0), min(c_max, self.columns - 1) + 1):
+            if r_min >= 0:
+                yield c, r_min
+            if r_max < self.rows:
+                yield c, r_max
+
+        # Left and right columns, without the corners
+        for r in range(max(r_min + 1, 0), min(r_max - 1, self.rows - 1) + 1):
+            if c_min >= 0:
+                yield c_min, r
+            if c_max < self.columns:
+                yield c_max, r
+
+
+    def within(self, x, depth, radius):
+        # Every fish inside a radius (e.g. to draw a sonar)
+        c_min, r_min = self.cell_position(x - radius, depth - radius)
+        c_max, r_max = self.cell_position(x + radius, depth + radius)
+        radius_2 = radius * radius
+
+        found = []
+        for r in range(r_min, r_max + 1):
+            for c in range(c_min, c_max + 1):
+                for fish in self.cells[r * self.columns + c]:
+                    dx = fish.x - x
+                    dy = fish.depth - depth
+                    if dx * dx + dy * dy <= radius_2:
+                        found.append(fish)
+        return found
@@ -0,0 +1,350 @@
+# ======================================================================
+# FISHING MINI-GAME - SIMULATION CORE
+# ======================================================================
+# Pure simulation of the fishing mini-game: no pyxel call in here.
+# Input is given to FishingMiniGame.update() for each tick, so the game
+# can be stepped from a pyxel app, a test or a tuning script.
+#
+# FixedFishingMiniGame runs the cursor on fixed-point integers instead of
+# floats: the exact same results on every platform and process (replays,
+# batch runs, result comparisons). Each move lands within a pixel of the
+# float one, but sessions drift apart: a cursor exactly on a bounce or
+# speed limit in fixed-point is a hair off it in floats, so the two
+# bounce a tick apart now and then, and a session can end differently
+# (calibrate.py --check-fixed measures both).
+
+from enum import Enum
+from random import Random
+
+from patterns import PATTERNS, COMPILED_PATTERNS, FRAME_SLOTS, TILE_SIZE
+
+
+
+# App level constants
+SCREEN_HEIGHT = 160
+SCREEN_WIDTH = 240
+
+# Module level constants
+Y = TILE_SIZE * 4
+
+# Distance the hook starts at
+DISTANCE_START = 40
+
+# Fixed-point physics: positions and velocities in 1/FIXED_SCALE pixel
+FIXED_SCALE = 1000000
+
+# Default random generator for pattern picks (pass a seeded one to get
+# the same patterns again, e.g. when replaying a session)
+RANDOM = Random()
+
+
+
+# Fishing status
+class FishingStatus(Enum):
+    ONGOING = 'ongoing'
+    SUCCESS = 'success'
+    FAILURE = 'failure'
+    ABORT = 'abort'
+
+
+
+class Frame:
+    def __init__(self):
+
+        # Frame dimensions
+        self.size = TILE_SIZE * FRAME_SLOTS
+        self.xmin = SCREEN_WIDTH / 2 - self.size / 2
+        self.xmax = self.xmin + self.size
+        self.y = Y
+
+
+
+class FishCursor:
+    # One per session: no per-instance dict (the many-cursors version of
+    # this physics is batch.BatchFishing, one array per field)
+    __slots__ = (
+        'frame', 'size', 'x', 'y',
+        'velocity', 'acceleration', 'deceleration', 'max_velocity', 'bounce'
+    )
+
+    def __init__(self, frame):
+
+        # Related objects
+        self.frame = frame
+
+        # Cursor dimensions
+        self.size = TILE_SIZE
+        self.y = Y
+
+        # Cursor movement
+        self.acceleration = 0.1
+        self.deceleration = 0.2
+        self.max_velocity = 6.0
+        self.bounce = 0.6
+
+        self.reset()
+
+
+    def reset(self):
+        # Back to the center, still
+        self.x = SCREEN_WIDTH / 2 - self.size / 2
+        self.velocity = 0
+
+
+    def move(self, pull):
+        # Accelerate to right when pulling (SPACE is pressed)
+        if pull:
+
+            # If speed < max, accelerate
+            if self.velocity < self.max_velocity:
+                self.velocity += self.deceleration
+
+        # Accelerate to left when released
+        else:
+
+            # If speed < max, accelerate
+            if self.velocity > -self.max_velocity:
+                self.velocity -= self.acceleration
+
+        # Calculate next position
+        target_position = self.x + self.velocity
+
+        # If we hit the sides, bounce
+        if target_position >= self.frame.xmax - self.size - 1:
+            self.velocity *= -self.bounce
+        elif target_position <= self.frame.xmin + 1:
+            self.velocity *= -self.bounce
+        else:
+            self.x = target_position
+
+
+
+def to_fixed(value):
+    return round(value * FIXED_SCALE)
+
+
+def fixed_scale(value, factor):
+    # value * factor (both fixed-point), rounded toward 0 like the
+    # batch version
+    product = abs(value) * factor // FIXED_SCALE
+    return product if value >= 0 else -product
+
+
+
+class FixedFishCursor(FishCursor):
+    # FishCursor.move on integers (1/FIXED_SCALE pixel), x and velocity
+    # are kept as floats for drawing and the pattern
+    __slots__ = (
+        'x_fixed', 'velocity_fixed',
+        'acceleration_fixed', 'deceleration_fixed', 'max_velocity_fixed', 'bounce_fixed',
+        'left_fixed', 'right_fixed'
+    )
+
+    def reset(self):
+        super().reset()
+
+        # Constants, from the float ones
+        self.acceleration_fixed = to_fixed(self.acceleration)
+        self.deceleration_fixed = to_fixed(self.deceleration)
+        self.max_velocity_fixed = to_fixed(self.max_velocity)
+        self.bounce_fixed = to_fixed(self.bounce)
+
+        # Bounce limits
+        self.left_fixed = to_fixed(self.frame.xmin + 1)
+        self.right_fixed = to_fixed(self.frame.xmax - self.size - 1)
+
+        self.x_fixed = to_fixed(self.x)
+        self.velocity_fixed = 0
+
+
+    def move(self, pull):
+        velocity = self.velocity_fixed
+
+        # Accelerate to right when pulling, to left when released
+        if pull:
+            if velocity < self.max_velocity_fixed:
+                velocity += self.deceleration_fixed
+        else:
+            if velocity > -self.max_velocity_fixed:
+                velocity -= self.acceleration_fixed
+
+        # Bounce on the sides, otherwise move
+        target_position = self.x_fixed + velocity
+        if target_position >= self.right_fixed or target_position <= self.left_fixed:
+            velocity = -fixed_scale(velocity, self.bounce_fixed)
+        else:
+            self.x_fixed = target_position
+
+        self.velocity_fixed = velocity
+        self.x = self.x_fixed / FIXED_SCALE
+        self.velocity = velocity / FIXED_SCALE
+
+
+
+class Pattern:
+    def __init__(self, frame, cursor, difficulty, pattern = None, rng = None):
+
+        # Frame dimensions
+        self.frame = frame
+
+        # Related cursor
+        self.cursor = cursor
+
+        self.reset(difficulty, pattern, rng)
+
+
+    def reset(self, difficulty, pattern = None, rng = None):
+
+        # Random generator
+        self.rng = rng if rng is not None else RANDOM
+
+        # Pattern to use (random one if not given)
+        self.pattern_difficulty = difficulty
+        if pattern is None:
+            pattern = self.pick_a_pattern(difficulty)
+        self.pattern = pattern
+        self.compiled = COMPILED_PATTERNS[difficulty][self.pattern]
+
+        # Speed
+        self.speed = 1
+
+
+    def pick_a_pattern(self, difficulty):
+        # Get number of patterns available
+        n_patterns = len(PATTERNS[difficulty]['patterns'])
+
+        # Get random pattern between 0 and max number of patterns available
+        pattern = self.rng.randrange(0, n_patterns)
+        return pattern
+
+
+    def update(self):
+        # ===== Get speed at which we close the distance to the surface: =====
+        # Get cursor center position, relative to the frame
+        cursor_center = self.cursor.x + (self.cursor.size / 2)
+        offset = cursor_center - self.frame.xmin
+
+        # Get cursor speed from the compiled pattern (one speed per pixel)
+        speeds = self.compiled.speeds
+        if offset >= 0 and offset < len(speeds):
+            self.speed = speeds[int(offset)]
+
+
+
+class FishingMiniGame:
+    # Cursor physics (FixedFishCursor: fixed-point)
+    cursor_class = FishCursor
+
+    def __init__(self, distance, difficulty, pattern = None, rng = None):
+
+        # Related objects
+        self.frame = Frame()
+        self.cursor = self.cursor_class(frame = self.frame)
+        self.pattern = Pattern(
+            frame = self.frame,
+            cursor = self.cursor,
+            difficulty = difficulty,
+            pattern = pattern,
+            rng = rng
+            )
+
+        # Dimensions
+        self.width = self.frame.size
+
+        self.reset_progress(distance)
+
+
+    def reset(self, distance, difficulty, pattern = None, rng = None):
+        # Start a new session with the same objects (see SessionPool)
+        self.cursor.reset()
+        self.pattern.reset(difficulty, pattern, rng)
+        self.reset_progress(distance)
+
+
+    def reset_progress(self, distance):
+
+        # Distance bar progress
+        self.distance_max = distance
+        self.distance_current = DISTANCE_START
+        self.distance_speed = 1
+
+        # Fishing mini-game events
+        self.status = FishingStatus.ONGOING
+        self.ticks = 0
+
+
+    def update(self, pull, abort = False):
+
+        # Count simulation ticks
+        self.ticks += 1
+
+        # If fishing is ongoing, animate cursor
+        self.cursor.move(pull)
+
+        # Get speed from pattern
+        self.pattern.update()
+
+        # Get current distance cursor speed
+        self.distance_speed = self.pattern.speed
+
+        # Close distance to the surface
+        self.distance_current += self.distance_speed
+
+        # Handle success and failure
+        if self.status == FishingStatus.ONGOING:
+            if self.distance_current >= self.distance_max: # SUCCESS
+                self.status = FishingStatus.SUCCESS
+
+            elif self.distance_current < 0: # FAILURE
+                self.status = FishingStatus.FAILURE
+
+            elif abort: # ABORT
+                self.status = FishingStatus.ABORT
+
+
+
+class FixedFishingMiniGame(FishingMiniGame):
+    cursor_class = FixedFishCursor
+
+
+
+class SessionPool:
+    # Finished sessions kept for the next ones: acquire() resets one in
+    # place instead of building a new frame, cursor and pattern
+
+    def __init__(self, game_class = FishingMiniGame, size = 4):
+        self.game_class = game_class
+        self.size = size
+        self.free = []
+
+
+    def acquire(self, distance, difficulty, pattern = None, rng = None):
+        if self.free:
+            game = self.free.pop()
+            game.reset(distance, difficulty, pattern, rng)
+            return game
+        return self.game_class(distance, difficulty, pattern, rng)
+
+
+    def release(self, game):
+        # Keep at most `size` sessions, the others are left to the GC
+        if len(self.free) < self.size:
+            self.free.append(game)
+
+
+
+def run_session(distance, difficulty, inputs, pattern = None, rng = None, game = None):
+    # Step one session with a stream of booleans (True = SPACE held)
+    # until it ends or the input stream runs out (reusing game if given)
+    if game is None:
+        game = FishingMiniGame(distance, difficulty, pattern, rng)
+    else:
+        game.reset(distance, difficulty, pattern, rng)
+
+    for pull in inputs:
+        game.update(pull)
+
+        if game.status != FishingStatus.ONGOING:
+            break
+
+    return game
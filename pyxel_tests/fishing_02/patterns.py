@@ -0,0 +1,179 @@
+from collections import namedtuple
+
+
+
+# Pattern dimensions
+TILE_SIZE = 8
+FRAME_SLOTS = 12
+
+
+
+# Fishing mini-game patterns (12 slots inside the current frame)
+### Easy
+E_01 = [
+    ['slow', 1],
+    ['medium', 2],
+    ['fast', 6],
+    ['medium', 2],
+    ['slow', 1]
+]
+E_02 = [
+    ['slow', 1],
+    ['medium', 4],
+    ['fast', 5],
+    ['medium', 1],
+    ['slow', 1]
+]
+E_03 = [
+    ['slow', 1],
+    ['medium', 1],
+    ['fast', 5],
+    ['medium', 4],
+    ['slow', 1]
+]
+
+### Regular
+R_01 = [
+    ['slow', 2],
+    ['medium', 2],
+    ['fast', 4],
+    ['medium', 2],
+    ['slow', 2]
+]
+R_02 = [
+    ['slow', 1],
+    ['medium', 1],
+    ['fast', 4],
+    ['medium', 3],
+    ['slow', 3]
+]
+R_03 = [
+    ['slow', 3],
+    ['medium', 3],
+    ['fast', 4],
+    ['medium', 1],
+    ['slow', 1]
+]
+
+### Hard
+H_01 = [
+    ['slow', 3],
+    ['medium', 1],
+    ['fast', 1],
+    ['medium', 2],
+    ['fast', 2],
+    ['medium', 1],
+    ['slow', 2]
+]
+H_02 = [
+    ['slow', 2],
+    ['medium', 1],
+    ['fast', 2],
+    ['medium', 2],
+    ['fast', 1],
+    ['medium', 1],
+    ['slow', 3]
+]
+H_03 = [
+    ['slow', 1],
+    ['medium', 1],
+    ['fast', 2],
+    ['medium', 1],
+    ['slow', 3],
+    ['medium', 1],
+    ['fast', 1],
+    ['medium', 1],
+    ['slow', 1]
+]
+
+
+
+# Store fishing mini-game patterns and speeds by difficulty
+PATTERNS = {
+    'easy': {
+        'speeds': { 'slow': -2, 'medium': 1, 'fast': 3 },
+        'patterns': [E_01, E_02, E_03]
+    },
+    'regular': {
+        'speeds': { 'slow': -2, 'medium': 1, 'fast': 3 },
+        'patterns': [R_01, R_02, R_03]
+    },
+    'hard': {
+        'speeds': { 'slow': -2, 'medium': 1, 'fast': 3 },
+        'patterns': [H_01, H_02, H_03]
+    }
+}
+
+
+
+# Compiled pattern:
+# - sections: (type, x offset, width) in pixels, ready to draw
+# - speeds: one speed per pixel of the frame, indexed by cursor offset
+CompiledPattern = namedtuple(
+    'CompiledPattern',
+    ['name', 'difficulty', 'sections', 'speeds']
+)
+
+
+
+def compile_pattern(name, difficulty, pattern, speeds):
+    sections = []
+    speed_table = []
+    x = 0
+    
+    for p in pattern:
+        type = p[0]
+        
+        # Slots can be a fraction of a tile, as long as it is a whole pixel
+        width = p[1] * TILE_SIZE
+        if width <= 0 or width != int(width):
+            raise ValueError(
+                f"{name}: slot '{type}' is {p[1]} tiles wide, "
+                f"which is not a positive number of pixels"
+            )
+        width = int(width)
+        
+        if type not in speeds:
+            raise ValueError(f"{name}: unknown speed '{type}'")
+        
+        sections.append((type, x, width))
+        speed_table.extend([speeds[type]] * width)
+        x += width
+    
+    # The pattern must fill the frame exactly
+    if x != FRAME_SLOTS * TILE_SIZE:
+        raise ValueError(
+            f"{name}: pattern is {x / TILE_SIZE} slots wide, "
+            f"expected {FRAME_SLOTS}"
+        )
+    
+    return CompiledPattern(
+        name = name,
+        difficulty = difficulty,
+        sections = tuple(sections),
+        speeds = tuple(speed_table)
+    )
+
+
+def compile_patterns(patterns):
+    compiled = {}
+    
+    for difficulty, table in patterns.items():
+        # Patterns are named after their difficulty (E_01, R_02, H_03…)
+        prefix = difficulty[0].upper()
+        compiled[difficulty] = tuple(
+            compile_pattern(
+                name = f"{prefix}_{i + 1:02d}",
+                difficulty = difficulty,
+                pattern = pattern,
+                speeds = table['speeds']
+            )
+            for i, pattern in enumerate(table['patterns'])
+        )
+    
+    return compiled
+
+
+
+# Compile every pattern once, when the module is loaded
+COMPILED_PATTERNS = compile_patterns(PATTERNS)
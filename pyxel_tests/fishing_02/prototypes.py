@@ -0,0 +1,171 @@
+# ======================================================================
+# FISHING MINI-GAME - PROTOTYPES
+# ======================================================================
+# The first two iterations of the mini-game, without pyxel. Nothing is
+# built at import, games are made on demand:
+#
+#   game = new_reel_game()
+#   game.update(pull = True)
+#
+# - PullGame (iteration_01.py): a SPACE press pulls the fish to the right
+#   along a speed curve, it swims back to the left otherwise
+# - ReelGame (iteration_02.py): the Stardew-like cursor physics kept by
+#   minigame.FishCursor, and a reel bar filling while the cursor is in the
+#   target area
+#
+# iteration_01.py and iteration_02.py are the pyxel front-ends: they read
+# the keyboard and draw.
+
+from minigame import SCREEN_WIDTH, TILE_SIZE
+
+
+
+class PullGame:
+    def __init__(self):
+
+        # Global Y positioning
+        self.Y = TILE_SIZE * 3
+
+        # Frame
+        self.frame_size = TILE_SIZE * 12
+        self.frame_xmin = SCREEN_WIDTH / 2 - self.frame_size / 2
+        self.frame_xmax = self.frame_xmin + self.frame_size
+
+        # Target area
+        self.target_size = TILE_SIZE * 3
+        self.target_xmin = self.frame_xmin + 32
+
+        # Cursor (fish)
+        self.cursor_size = TILE_SIZE
+        self.cursor_x = SCREEN_WIDTH / 2 - self.cursor_size / 2
+        self.cursor_speed = 2
+
+        # Animation - pull
+        self.animate_pull = -1
+        self.animate_pull_speeds = [2, 4, 6, 5, 4, 3, 2, 1, 0, 0, -1]
+
+
+    def update(self, pull = False):
+
+        # Pull the fish (pull: SPACE was just pressed)
+        if self.animate_pull < 0 and pull:
+            self.animate_pull = 0
+
+        # If animate_pull >= 0, play pulling animation instead
+        elif self.animate_pull >= 0:
+
+            # Get pull animtion speed for this frame
+            speed = self.animate_pull_speeds[self.animate_pull]
+
+            # Check if the next movement = collision
+            cursor_xmax = self.cursor_x + self.cursor_size
+            next_position = cursor_xmax + speed
+
+            # If next movement is inside mini-game frame, move
+            if next_position < self.frame_xmax:
+                self.cursor_x += speed
+
+            # Else, if we do not touch the frame border, close the gap
+            elif cursor_xmax < self.frame_xmax - 1:
+                self.cursor_x = self.frame_xmax - 1 - self.cursor_size
+
+            # Increment animation frame count
+            if self.animate_pull < len(self.animate_pull_speeds) - 1:
+                self.animate_pull += 1
+
+            # Else, the animation is over
+            else:
+                self.animate_pull = -1
+
+        # If not pulling, the fish moves to the left
+        else:
+
+            # Check if next movement = collision
+            next_position = self.cursor_x - self.cursor_speed
+
+            # If next movement is inside frame, move
+            if next_position > self.frame_xmin:
+                self.cursor_x -= self.cursor_speed
+
+            # Else, if we do not touch the frame border, close the gap
+            elif self.cursor_x > self.frame_xmin + 1:
+                self.cursor_x = self.frame_xmin + 1
+
+
+
+class ReelGame:
+    def __init__(self):
+
+        # Global Y positioning
+        self.Y = TILE_SIZE * 4
+
+        # Frame
+        self.frame_size = TILE_SIZE * 12
+        self.frame_xmin = SCREEN_WIDTH / 2 - self.frame_size / 2
+        self.frame_xmax = self.frame_xmin + self.frame_size
+
+        # Target area
+        self.target_size = TILE_SIZE * 3
+        self.target_xmin = self.frame_xmin + 32
+
+        # Cursor (fish)
+        self.cursor_size = TILE_SIZE
+        self.cursor_x = SCREEN_WIDTH / 2 - self.cursor_size / 2
+
+        self.cursor_velocity = 0
+        self.cursor_acceleration = 0.1
+        self.cursor_deceleration = 0.2
+        self.cursor_max_velocity = 6.0
+        self.cursor_bounce = 0.6
+
+        # Reel
+        self.reel_value = 0
+        self.reel_velocity = 0.1
+        self.reel_distance = 10
+
+
+    def update(self, pull = False):
+
+        # Accelerate towards right when SPACE is held (pull)
+        if pull:
+
+            # If the fish speed is not at max to the right, increase acceleration
+            if self.cursor_velocity < self.cursor_max_velocity:
+                self.cursor_velocity += self.cursor_deceleration
+
+        # Accelerate towards left when released
+        else:
+
+            # If the fish speed is not at max to the left, increase acceleration
+            if self.cursor_velocity > -self.cursor_max_velocity:
+                self.cursor_velocity -= self.cursor_acceleration
+
+        # Move the fish
+        target_position = self.cursor_x + self.cursor_velocity
+
+        # If we hit the sides, bounce
+        if target_position >= self.frame_xmax - self.cursor_size - 1:
+            self.cursor_velocity *= -self.cursor_bounce
+        elif target_position <= self.frame_xmin + 1:
+            self.cursor_velocity *= -self.cursor_bounce
+        else:
+            self.cursor_x = target_position
+
+        # Check if the cursor si in red, orange or green
+        cursor_center = self.cursor_x + (self.cursor_size / 2)
+
+        if cursor_center >= self.target_xmin and cursor_center <= (self.target_xmin + self.target_size):
+            if self.reel_value < self.frame_size:
+                self.reel_value += 1
+
+
+
+def new_pull_game(game_class = PullGame):
+    # Fresh iteration 1 game (game_class: a front-end PullGame subclass,
+    # e.g. with a draw method)
+    return game_class()
+
+
+def new_reel_game(game_class = ReelGame):
+    # Fresh iteration 2 game (game_class: a front-end ReelGame subclass)
+    return game_class()
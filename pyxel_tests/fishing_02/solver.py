@@ -0,0 +1,384 @@
+# ======================================================================
+# FISHING MINI-GAME - OPTIMAL POLICY SOLVER
+# ======================================================================
+# The mini-game is deterministic: its state is the cursor position and
+# velocity and the distance to the surface, and the only control is SPACE
+# held or released. This discretizes the cursor state on a grid, builds
+# the transitions of every grid state once with NumPy, and solves by
+# dynamic programming, for each pattern:
+# - the minimum number of ticks to catch the fish, from every state
+# - the win region: states from which the fish can still be caught (the
+#   game has no randomness, so the win probability of a state is 1 inside
+#   it and 0 outside)
+# - the optimal policy: hold SPACE or not, in every state
+#
+# The grid is a lattice of the fixed-point physics (minigame.FIXED_SCALE),
+# and moves are computed like FixedFishCursor: accelerations keep a cursor
+# on the lattice, and so do bounces whose velocity * 0.6 lands on it. Moves
+# leaving the lattice (other bounces) are left out, so the results are
+# bounds, not verdicts:
+# - a win found is a real one, the policy plays it in the game in the
+#   ticks found (--check), but a faster one may need an off-lattice bounce:
+#   the minimum time is "at most"
+# - the win region is "at least", and a pattern with no win found on the
+#   lattice may still be winnable with such bounces
+# The exact states reachable from the start grow about 9x every 10 ticks,
+# too many to search them all.
+#
+# Results are cached on disk, keyed by the pattern speeds, the physics
+# constants, the distance and the grid, so after a pattern edit only the
+# changed patterns are solved again.
+#
+# Usage (from fishing_02/):
+#   python solver.py
+#   python solver.py --patterns H_01 H_03 --distance 500
+#   python solver.py --check     # play the policies in the batch simulator
+#                                # (exits with an error if a time differs)
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from batch import BatchFishing, ALL_PATTERNS, PATTERN_IDS, SUCCESS
+from minigame import FixedFishingMiniGame, DISTANCE_START, FIXED_SCALE, to_fixed
+
+
+
+# Frames per second of the pyxel app, to show times in seconds
+FPS = 30
+
+# Default distance (same depth as the App)
+DISTANCE = 300
+
+# Grid steps: velocity changes by 0.1 / 0.2 per tick and positions by the
+# velocity, so only bounces can leave this grid
+X_STEP = 0.1
+V_STEP = 0.1
+
+# Grid index of the cursor states off the grid
+OFF_GRID = -1
+
+# Ticks stored as int16, unwinnable states get NEVER
+NEVER = np.iinfo(np.int16).max
+
+# Policy table values
+RELEASE = 0
+PULL = 1
+LOST = -1
+
+# Solved tables, by key
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.solver_cache')
+VERSION = 2
+
+
+
+class Physics:
+    # Frame and cursor constants, from a reference session (fixed-point)
+
+    def __init__(self):
+        reference = FixedFishingMiniGame(distance = 1, difficulty = 'easy', pattern = 0)
+        frame = reference.frame
+        cursor = reference.cursor
+
+        self.xmin = frame.xmin
+        self.size = cursor.size
+        self.x_start = cursor.x_fixed
+        self.acceleration = cursor.acceleration_fixed
+        self.deceleration = cursor.deceleration_fixed
+        self.max_velocity = cursor.max_velocity_fixed
+        self.bounce = cursor.bounce_fixed
+        self.left = cursor.left_fixed
+        self.right = cursor.right_fixed
+
+
+    def constants(self):
+        return {name: float(value) for name, value in sorted(vars(self).items())}
+
+
+    def move(self, x, velocity, pull):
+        # FixedFishCursor.move on arrays
+        accelerate = np.where(pull, velocity < self.max_velocity, velocity > -self.max_velocity)
+        velocity = velocity + np.where(
+            accelerate,
+            np.where(pull, self.deceleration, -self.acceleration),
+            0
+        )
+
+        target_position = x + velocity
+        hit = (target_position >= self.right) | (target_position <= self.left)
+        bounced = np.abs(velocity) * self.bounce // FIXED_SCALE
+        velocity = np.where(hit, np.where(velocity >= 0, -bounced, bounced), velocity)
+        x = np.where(hit, x, target_position)
+        return x, velocity
+
+
+    def offset(self, x):
+        # Pattern.update: cursor center from the frame left side (pixels)
+        return x / FIXED_SCALE + self.size / 2 - self.xmin
+
+
+
+class Grid:
+    # Cursor states (fixed-point): positions between the frame sides on a
+    # lattice through the start position, velocities up to the max
+    # velocity (+ one step of overshoot) on a lattice through 0
+
+    def __init__(self, physics, x_step = X_STEP, v_step = V_STEP):
+        self.x_step = x_step
+        self.v_step = v_step
+        self.x_unit = to_fixed(x_step)
+        self.v_unit = to_fixed(v_step)
+
+        self.x_low = physics.x_start - (physics.x_start - physics.left) // self.x_unit * self.x_unit
+        self.nx = (physics.right - self.x_low) // self.x_unit + 1
+
+        v_max = (physics.max_velocity + physics.deceleration) // self.v_unit * self.v_unit
+        self.v_low = -v_max
+        self.nv = 2 * v_max // self.v_unit + 1
+
+        self.size = self.nx * self.nv
+        xi, vi = np.divmod(np.arange(self.size, dtype = np.int64), self.nv)
+        self.x = self.x_low + xi * self.x_unit
+        self.velocity = self.v_low + vi * self.v_unit
+
+
+    def index(self, x, velocity):
+        # Grid states of fixed-point cursor states (arrays), OFF_GRID for
+        # the states between grid points or outside of it
+        xi, x_rest = np.divmod(x - self.x_low, self.x_unit)
+        vi, v_rest = np.divmod(velocity - self.v_low, self.v_unit)
+        on_grid = (
+            (x_rest == 0) & (v_rest == 0)
+            & (xi >= 0) & (xi < self.nx)
+            & (vi >= 0) & (vi < self.nv)
+        )
+        return np.where(on_grid, xi * self.nv + vi, OFF_GRID).astype(np.intp)
+
+
+
+class Solution:
+    def __init__(self, name, distance, grid, ticks, policy):
+        self.name = name
+        self.distance = distance
+        self.grid = grid
+
+        # ticks[d, s]: minimum ticks to catch from distance d and grid
+        # state s on the lattice (NEVER if no win found), policy[d, s]:
+        # PULL, RELEASE or LOST
+        self.ticks = ticks
+        self.policy = policy
+
+
+    def start_ticks(self, physics):
+        start = self.grid.index(np.array(physics.x_start), np.array(0))
+        return int(self.ticks[DISTANCE_START, start])
+
+
+    def winnable(self, physics):
+        # True if a win was found (False is not a proof of the opposite)
+        return self.start_ticks(physics) != NEVER
+
+
+    def win_region(self):
+        # Share of the states the fish can be caught from on the lattice
+        # (a lower bound)
+        return float((self.ticks != NEVER).mean())
+
+
+    def batch_policy(self):
+        # Policy for the batch simulator (LOST and off grid states release
+        # SPACE)
+        def policy(batch):
+            d = np.clip(batch.distance_current, 0, self.distance - 1)
+            s = self.grid.index(
+                np.rint(batch.x * FIXED_SCALE).astype(np.int64),
+                np.rint(batch.velocity * FIXED_SCALE).astype(np.int64)
+            )
+            return (s != OFF_GRID) & (self.policy[d, s] == PULL)
+        return policy
+
+
+
+# ======================================================================
+# SOLVER
+# ======================================================================
+
+def solve(compiled, distance, physics, grid):
+    # Transitions of every grid state, for both actions (OFF_GRID when the
+    # move leaves the grid), and distance gained by each move (speed under
+    # the cursor after it)
+    speeds = np.asarray(compiled.speeds)
+
+    def gain(x):
+        return speeds[np.clip(physics.offset(x), 0, len(speeds) - 1).astype(np.intp)]
+
+    moves = [physics.move(grid.x, grid.velocity, pull) for pull in (False, True)]
+    next_state = np.stack([grid.index(*move) for move in moves])
+    next_gain = np.stack([gain(x) for x, velocity in moves])
+    state_gain = gain(grid.x)
+
+    # Reverse transitions: (grid state, action) pairs leading to each grid
+    # state, as keys state * 2 + action
+    keys = np.concatenate([np.arange(grid.size) * 2 + a for a in (RELEASE, PULL)])
+    on_grid = next_state.ravel() != OFF_GRID
+    order = np.argsort(next_state.ravel()[on_grid], kind = 'stable')
+    predecessors = keys[on_grid][order]
+    first = np.searchsorted(next_state.ravel()[on_grid][order], np.arange(grid.size + 1))
+
+    # ticks[d, s]: minimum ticks to catch from distance d, grid state s,
+    # policy[d, s]: the action to take (release wins ties)
+    ticks = np.full((distance, grid.size), NEVER, dtype = np.int16)
+    policy = np.full((distance, grid.size), LOST, dtype = np.int8)
+
+    # One tick from the catch: a move reaching the distance (only the
+    # last rows can), on the grid or not
+    top = max(distance - int(next_gain.max()), 0)
+    d = np.arange(top, distance)[:, None]
+    for a in (PULL, RELEASE):
+        catch = d + next_gain[a][None, :] >= distance
+        ticks[top:][catch] = 1
+        policy[top:][catch] = a
+    frontier = np.flatnonzero(ticks[top:] == 1) + top * grid.size
+
+    # Backward breadth-first search, one tick at a time: the states one
+    # move before the frontier states, not reached yet (every state is
+    # visited once, whatever the number of ticks)
+    flat_ticks = ticks.ravel()
+    flat_policy = policy.ravel()
+    tick = 1
+    while len(frontier):
+        d_next, s_next = np.divmod(frontier, grid.size)
+        counts = first[s_next + 1] - first[s_next]
+        total = int(counts.sum())
+        if total == 0:
+            break
+
+        # Every (frontier state, predecessor) pair
+        starts = np.repeat(first[s_next] - np.cumsum(counts) + counts, counts)
+        key = predecessors[starts + np.arange(total)]
+        d = np.repeat(d_next - state_gain[s_next], counts)
+
+        # Keys of the new states: (d * size + s) * 2 + action
+        inside = (d >= 0) & (d < distance)
+        key = d[inside] * (grid.size * 2) + key[inside]
+        key = key[flat_ticks[key >> 1] == NEVER]
+
+        # One action per state, release first (np.unique is slower than
+        # a sort here)
+        key.sort()
+        index = key >> 1
+        keep = np.empty(len(index), dtype = bool)
+        keep[:1] = True
+        np.not_equal(index[1:], index[:-1], out = keep[1:])
+
+        tick += 1
+        frontier = index[keep]
+        flat_ticks[frontier] = tick
+        flat_policy[frontier] = key[keep] & 1
+
+    return Solution(compiled.name, distance, grid, ticks, policy)
+
+
+
+# ======================================================================
+# DISK CACHE
+# ======================================================================
+
+def cache_key(compiled, distance, physics, grid):
+    # Everything the solution depends on
+    key = {
+        'version': VERSION,
+        'speeds': list(compiled.speeds),
+        'distance': distance,
+        'distance_start': DISTANCE_START,
+        'physics': physics.constants(),
+        'grid': [grid.x_step, grid.v_step]
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys = True).encode()).hexdigest()[:32]
+
+
+def solve_cached(compiled, distance, physics, grid, cache_dir = CACHE_DIR):
+    path = os.path.join(cache_dir, f"{compiled.name}_{cache_key(compiled, distance, physics, grid)}.npz")
+    if os.path.exists(path):
+        with np.load(path) as data:
+            return Solution(compiled.name, distance, grid, data['ticks'], data['policy'])
+
+    solution = solve(compiled, distance, physics, grid)
+    os.makedirs(cache_dir, exist_ok = True)
+    np.savez_compressed(path + '.tmp.npz', ticks = solution.ticks, policy = solution.policy)
+    os.replace(path + '.tmp.npz', path)
+    return solution
+
+
+
+# ======================================================================
+# REPORT
+# ======================================================================
+
+def check(solution, distance, max_ticks):
+    # Play the policy in the batch simulator (the game physics), ticks
+    # taken or None if the fish is not caught
+    batch = BatchFishing(1, distance, solution.name, fixed = True)
+    batch.run(solution.batch_policy(), max_ticks)
+    if batch.status[0] == SUCCESS:
+        return int(batch.end_tick[0])
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Optimal play of the fishing mini-game patterns")
+    parser.add_argument('--patterns', nargs = '+', default = list(PATTERN_IDS), choices = list(PATTERN_IDS))
+    parser.add_argument('--distance', type = int, default = DISTANCE)
+    parser.add_argument('--x-step', type = float, default = X_STEP)
+    parser.add_argument('--v-step', type = float, default = V_STEP)
+    parser.add_argument('--check', action = 'store_true', help = "play the policies in the batch simulator")
+    parser.add_argument('--no-cache', action = 'store_true')
+    args = parser.parse_args()
+
+    physics = Physics()
+    grid = Grid(physics, args.x_step, args.v_step)
+
+    # Bounds on the lattice: wins found, min time at most, win region at
+    # least
+    print(
+        f"{'pattern':<8} {'win found':>9} {'min time <=':>12} {'win region >=':>13}"
+        + (f" {'played':>12}" if args.check else '')
+    )
+    mismatches = []
+    not_found = []
+    for name in args.patterns:
+        compiled = ALL_PATTERNS[PATTERN_IDS[name]]
+        if args.no_cache:
+            solution = solve(compiled, args.distance, physics, grid)
+        else:
+            solution = solve_cached(compiled, args.distance, physics, grid)
+
+        ticks = solution.start_ticks(physics)
+        if ticks == NEVER:
+            not_found.append(name)
+            line = f"{name:<8} {'not found':>9} {'-':>12} {solution.win_region():>12.1%}"
+        else:
+            line = f"{name:<8} {'yes':>9} {ticks:>5} ({ticks / FPS:4.1f}s) {solution.win_region():>12.1%}"
+
+        if args.check:
+            played = check(solution, args.distance, max_ticks = 10 * max(ticks if ticks != NEVER else 0, FPS * 60))
+            line += f" {'lost':>12}" if played is None else f" {played:>5} ({played / FPS:4.1f}s)"
+            if played != (None if ticks == NEVER else ticks):
+                mismatches.append(name)
+        print(line)
+
+    if not_found:
+        print(f"No win found on the lattice for {' '.join(not_found)} (off-lattice bounces may still win)")
+
+    # The policies must play in the game exactly as solved
+    if mismatches:
+        print(f"Played times differ from the solved ones: {' '.join(mismatches)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
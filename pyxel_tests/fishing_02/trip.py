@@ -0,0 +1,101 @@
+# ======================================================================
+# FISHING TRIP - SIMULATION
+# ======================================================================
+# A fishing trip on a lake, without pyxel: casts, the fish that bites and
+# the mini-game sessions to reel it in. Nothing is built at import, trips
+# are made on demand (a seeded rng gives the same lake and patterns):
+#
+#   trip = new_game(rng = Random(1))
+#   trip.update(cast = True)
+#   trip.update(pull = True)
+#
+# iteration_03.py is the pyxel front-end: it reads the keyboard and draws.
+
+from random import Random
+
+from lake import Lake
+from minigame import FishingMiniGame, FishingStatus, SessionPool
+
+
+
+# Hook depth
+DEPTH = 300
+
+# Fish in the lake
+LAKE_FISH = 3000
+
+
+
+class FishingTrip:
+    def __init__(self, game_class = FishingMiniGame, rng = None, depth = DEPTH, fish = LAKE_FISH):
+
+        # Random generator of the lake, the casts and the patterns
+        self.rng = rng if rng is not None else Random()
+
+        # Hook depth
+        self.depth = depth
+
+        # Sessions are reused from one cast to the next
+        self.sessions = SessionPool(game_class)
+
+        # Lake full of fish, and the fish on the hook
+        self.lake = Lake()
+        self.lake.populate(fish, self.rng)
+        self.fish = None
+
+        # Mini-game session, False when not fishing
+        self.fishing = False
+
+        # Show mini-game related message
+        self.message = False
+
+
+    def update(self, cast = False, pull = False, abort = False):
+
+        # Cast the hook somewhere in the lake
+        if cast and not self.fishing:
+
+            # The nearest fish bites
+            cast_x = self.rng.uniform(0, self.lake.width)
+            self.fish = self.lake.nearest(cast_x, self.depth)
+
+            # Create fishing minigame: reel the fish up from its depth
+            if self.fish is None:
+                self.message = "Nothing bites, try somewhere else"
+            else:
+                self.fishing = self.sessions.acquire(
+                    self.fish.depth,
+                    self.fish.difficulty,
+                    rng = self.rng
+                )
+
+        # If we are fishing, run the mini_game until it returns success or failure
+        if self.fishing:
+
+            # Run minigame
+            self.fishing.update(pull, abort)
+
+            # Do something on success
+            if self.fishing.status == FishingStatus.SUCCESS:
+                self.message = f"Well done, you caught a {self.fish.species.name}"
+                self.lake.remove(self.fish)
+
+            # Do something on failure
+            elif self.fishing.status == FishingStatus.FAILURE:
+                self.message = "The fish is gone with your bait"
+
+            # Do something on abort fishing
+            elif self.fishing.status == FishingStatus.ABORT:
+                self.message = "You let the fish go with your bait"
+
+            # Session over: back to the pool for the next cast
+            if self.fishing.status != FishingStatus.ONGOING:
+                self.sessions.release(self.fishing)
+                self.fishing = False
+
+
+
+def new_game(game_class = FishingMiniGame, rng = None, depth = DEPTH, fish = LAKE_FISH):
+    # Fresh trip (game_class: a front-end FishingMiniGame subclass, e.g.
+    # with a draw method)
+    return FishingTrip(game_class, rng, depth, fish)
@@ -1,30 +1,19 @@
-import pyxel
-
-
-TILE_SIZE = 8
-
-
-
-class World():
-    HEIGHT = 16
-    WIDTH = 16
-
-    # World items
-    GROUND = (0, 0)
-    TREE = (1, 0)
+import os
+import sys
 
+import pyxel
 
+# Shared pyxel_tests modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import assets
+from common.loop import FixedTimestep
+from model.duck import new_game
+from model.world import TILE_SIZE, World
 
-class Player():
-    DUCK_SPRITE = (16, 0)
-    DUCK_STATIC = [(16, 0)]
-    DUCK_WALK = [(24, 0), (16, 0), (32, 0), (16, 0)]
 
-    X = 80
-    Y = 32
-    SPEED = 4
-    ANIMATION_TICK = 0
 
+# Ducks following the little duck
+FOLLOWERS = 3
 
 
 class App():
@@ -34,68 +23,27 @@ class App():
             height = World.HEIGHT * TILE_SIZE,
             title = "The little duck"
         )
-        pyxel.load("resources.pyxres")
+        assets.load(pyxel, "resources.pyxres", images = (0,), tilemaps = (0,))
+
+        # Ducks and world (no pyxel in there)
+        self.game = new_game(pyxel.tilemaps[0], followers = FOLLOWERS)
 
-        # Run game
-        pyxel.run(self.update, self.draw)
+        # Run game at a fixed tick rate, the ducks drawn between ticks
+        self.loop = FixedTimestep(pyxel, self.update, self.draw)
+        self.loop.interpolate(self.game.player, 'X', 'Y')
+        for follower in self.game.followers:
+            self.loop.interpolate(follower, 'X', 'Y')
+        self.loop.run()
     
     def update(self):
 
-        # Animate the little duck
-        Player.ANIMATION_TICK = int(pyxel.frame_count / 4 % 4)
-
         # Move the little duck
-        if pyxel.btn(pyxel.KEY_UP):
-            # What are the top tiles?
-            tile_left_x = int(Player.X / TILE_SIZE)
-            tile_right_x = int((Player.X + TILE_SIZE - 1) / TILE_SIZE)
-            tile_y = int((Player.Y - Player.SPEED) / TILE_SIZE)
-
-            tile_left = pyxel.tilemaps[0].pget(tile_left_x, tile_y)
-            tile_right = pyxel.tilemaps[0].pget(tile_right_x, tile_y)
-
-            if tile_left == World.GROUND and tile_right == World.GROUND:
-                # Move the duck
-                Player.Y -= Player.SPEED
-
-        elif pyxel.btn(pyxel.KEY_DOWN):
-            # What are the bottom tiles?
-            tile_left_x = int(Player.X / TILE_SIZE)
-            tile_right_x = int((Player.X + TILE_SIZE - 1) / TILE_SIZE)
-            tile_y = int((Player.Y + TILE_SIZE - 1 + Player.SPEED) / TILE_SIZE)
-
-            tile_left = pyxel.tilemaps[0].pget(tile_left_x, tile_y)
-            tile_right = pyxel.tilemaps[0].pget(tile_right_x, tile_y)
-
-            if tile_left == World.GROUND and tile_right == World.GROUND:
-                # Move the duck
-                Player.Y += Player.SPEED
-
-        elif pyxel.btn(pyxel.KEY_LEFT):
-            # What are the left tiles?
-            tile_x = int((Player.X - Player.SPEED) / TILE_SIZE)
-            tile_top_y = int(Player.Y / TILE_SIZE)
-            tile_bot_y = int((Player.Y + TILE_SIZE - 1) / TILE_SIZE)
-
-            tile_top = pyxel.tilemaps[0].pget(tile_x, tile_top_y)
-            tile_bot = pyxel.tilemaps[0].pget(tile_x, tile_bot_y)
-
-            if tile_top == World.GROUND and tile_bot == World.GROUND:
-                # Move the duck
-                Player.X -= Player.SPEED
-
-        elif pyxel.btn(pyxel.KEY_RIGHT):
-            # What are the left tiles?
-            tile_x = int((Player.X + TILE_SIZE - 1 + Player.SPEED) / TILE_SIZE)
-            tile_top_y = int(Player.Y / TILE_SIZE)
-            tile_bot_y = int((Player.Y + TILE_SIZE - 1) / TILE_SIZE)
-
-            tile_top = pyxel.tilemaps[0].pget(tile_x, tile_top_y)
-            tile_bot = pyxel.tilemaps[0].pget(tile_x, tile_bot_y)
-
-            if tile_top == World.GROUND and tile_bot == World.GROUND:
-                # Move the duck
-                Player.X += Player.SPEED
+        self.game.update(
+            up = pyxel.btn(pyxel.KEY_UP),
+            down = pyxel.btn(pyxel.KEY_DOWN),
+            left = pyxel.btn(pyxel.KEY_LEFT),
+            right = pyxel.btn(pyxel.KEY_RIGHT)
+        )
 
         # Quit game if "Q" is pressed
         if pyxel.btn(key = pyxel.KEY_Q):
@@ -116,17 +64,21 @@ class App():
             h = 16 * TILE_SIZE
         )
 
-        # Draw the little duck
-        pyxel.blt(
-            x = Player.X,
-            y = Player.Y,
-            img = 0,
-            u = Player.DUCK_WALK[Player.ANIMATION_TICK][0],
-            v = Player.DUCK_WALK[Player.ANIMATION_TICK][1],
-            w = TILE_SIZE,
-            h = TILE_SIZE,
-            colkey = 0
-        )
+        # Draw the followers, then the little duck on top
+        for duck in self.game.followers + [self.game.player]:
+            u, v = self.game.sprite(duck)
+            pyxel.blt(
+                x = duck.X,
+                y = duck.Y,
+                img = 0,
+                u = u,
+                v = v,
+                w = TILE_SIZE,
+                h = TILE_SIZE,
+                colkey = 0
+            )
+
 
 
-App()
\ No newline at end of file
+if __name__ == '__main__':
+    App()
@@ -0,0 +1,88 @@
+# ======================================================================
+# TILE COLLISIONS
+# ======================================================================
+# Walkability of every tile of the map, read from the tilemap once and
+# kept in a bytearray (1 = walkable). Entities of any size ask if their
+# box can move, instead of reading tiles with pget every frame.
+
+
+class WalkabilityMap:
+    def __init__(self, width, height, tile_size, walkable, tilemap = None):
+
+        # Map dimensions (tiles)
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+
+        # Tiles entities can walk on
+        self.walkable = frozenset(walkable)
+
+        # Tilemap kept in sync by set_tile()
+        self.tilemap = tilemap
+
+        # One byte per tile, row by row
+        self.cells = bytearray(width * height)
+
+        # Incremented each time a tile changes walkability
+        self.version = 0
+
+
+    @classmethod
+    def from_tilemap(cls, tilemap, width, height, tile_size, walkable):
+        walkability = cls(width, height, tile_size, walkable, tilemap)
+
+        for ty in range(height):
+            for tx in range(width):
+                if tilemap.pget(tx, ty) in walkability.walkable:
+                    walkability.cells[ty * width + tx] = 1
+
+        return walkability
+
+
+    def set_tile(self, tx, ty, tile):
+        # Change a tile, and update its walkability only
+        if self.tilemap is not None:
+            self.tilemap.pset(tx, ty, tile)
+
+        cell = 1 if tuple(tile) in self.walkable else 0
+        index = ty * self.width + tx
+        if self.cells[index] != cell:
+            self.cells[index] = cell
+            self.version += 1
+
+
+    def is_walkable(self, tx, ty):
+        # Outside of the map is never walkable
+        if tx < 0 or ty < 0 or tx >= self.width or ty >= self.height:
+            return False
+        return self.cells[ty * self.width + tx] == 1
+
+
+    def box_is_free(self, x, y, w, h):
+        # Are all the tiles under the box (pixels) walkable?
+        if x < 0 or y < 0:
+            return False
+
+        size = self.tile_size
+        tx_min = int(x // size)
+        tx_max = int((x + w - 1) // size)
+        ty_min = int(y // size)
+        ty_max = int((y + h - 1) // size)
+        if tx_max >= self.width or ty_max >= self.height:
+            return False
+
+        cells = self.cells
+        for ty in range(ty_min, ty_max + 1):
+            row = ty * self.width
+            for tx in range(tx_min, tx_max + 1):
+                if not cells[row + tx]:
+                    return False
+        return True
+
+
+    def can_move(self, x, y, w, h, dx, dy):
+        # Check the whole area swept by the box, so fast entities do not
+        # go through thin walls
+        x_min = min(x, x + dx)
+        y_min = min(y, y + dy)
+        return self.box_is_free(x_min, y_min, w + abs(dx), h + abs(dy))
@@ -0,0 +1,198 @@
+# ======================================================================
+# THE LITTLE DUCK - SIMULATION
+# ======================================================================
+# The duck walking in the world, without pyxel: its state, moves and
+# animation clock. Nothing is built at import, games are made on demand
+# (e.g. thousands of them in a test or a worker):
+#
+#   game = new_game(tilemap, followers = 3)
+#   game.update(right = True)
+#   game.player.X
+#
+# Followers are ducks walking to the player on their own, along A* paths
+# (model/navigation.py).
+#
+# game.py is the pyxel front-end: it reads the keyboard and draws. The
+# shared modules (common/) are imported from pyxel_tests/, which the
+# importer puts on the path: importing this changes no global state.
+
+import numpy as np
+
+from common.animation import AnimationClips, AnimationClock
+from common.entities import EntityStore, EntityView, Field
+from model.navigation import Navigator
+from model.world import TILE_SIZE, walkability
+
+
+
+class Player(EntityView):
+    # View on a row of an entity store (the duck's state lives in its
+    # arrays), the class attributes are shared by every duck
+    __slots__ = ()
+
+    DUCK_SPRITE = (16, 0)
+    DUCK_STATIC = [(16, 0)]
+    DUCK_WALK = [(24, 0), (16, 0), (32, 0), (16, 0)]
+
+    SPEED = 4
+
+    X = Field('X')
+    Y = Field('Y')
+    ANIMATION_PHASE = Field('ANIMATION_PHASE')
+
+    def __init__(self, store, x = 80, y = 32):
+        super().__init__(store, X = x, Y = y, ANIMATION_PHASE = 0)
+
+
+    def tile(self):
+        # Tile under the center of the duck
+        return (
+            int((self.X + TILE_SIZE / 2) // TILE_SIZE),
+            int((self.Y + TILE_SIZE / 2) // TILE_SIZE)
+        )
+
+
+
+class Follower(Player):
+    # Duck walking to the player, one tile at a time, towards the tile
+    # (TARGET_X, TARGET_Y). It stops DISTANCE tiles away from the player,
+    # so the followers line up behind it (DuckGame moves them all at once)
+    __slots__ = ()
+
+    SPEED = 2
+
+    TARGET_X = Field('TARGET_X')
+    TARGET_Y = Field('TARGET_Y')
+    DISTANCE = Field('DISTANCE')
+
+    def __init__(self, store, tx, ty, order = 0):
+        EntityView.__init__(
+            self,
+            store,
+            X = tx * TILE_SIZE,
+            Y = ty * TILE_SIZE,
+            ANIMATION_PHASE = order,
+            TARGET_X = tx,
+            TARGET_Y = ty,
+            DISTANCE = 1 + order
+        )
+
+
+
+class DuckGame:
+    def __init__(self, walkability, followers = 0):
+
+        # Walkable tiles of the world
+        self.walkability = walkability
+
+        # Animation clock shared by every sprite of this game, and the
+        # compiled clips
+        self.clock = AnimationClock()
+        self.clips = AnimationClips(self.clock)
+        self.walk_clip = self.clips.add("duck_walk", Player.DUCK_WALK, delay = 4)
+
+        # Ducks state, one array per field
+        self.ducks = EntityStore(
+            capacity = 1 + followers,
+            fields = {
+                'X': 'f8',
+                'Y': 'f8',
+                'ANIMATION_PHASE': 'i4',
+                'TARGET_X': 'i4',
+                'TARGET_Y': 'i4',
+                'DISTANCE': 'i4'
+            }
+        )
+        self.player = Player(self.ducks)
+
+        # Followers start on the tiles the farthest from the player
+        self.navigator = Navigator(walkability)
+        tiles = self.navigator.reachable(self.player.tile())[::-1]
+        self.followers = [
+            Follower(self.ducks, tx, ty, order)
+            for order, (tx, ty) in enumerate(tiles[:followers])
+        ]
+
+        # Followers rows (spawned one after the other): views on the
+        # arrays, no copies
+        first = self.followers[0].row if self.followers else 0
+        self.follower_rows = slice(first, first + len(self.followers))
+
+    def update(self, up = False, down = False, left = False, right = False):
+
+        # Animate the little duck (and any sprite on the shared clock)
+        self.clock.advance()
+
+        # Move the little duck
+        speed = Player.SPEED
+        dx = 0
+        dy = 0
+        if up:
+            dy = -speed
+        elif down:
+            dy = speed
+        elif left:
+            dx = -speed
+        elif right:
+            dx = speed
+
+        # Move only if the duck stays on the ground (position read once
+        # from the arrays, a view access costs more than the move)
+        if dx or dy:
+            ducks = self.ducks
+            row = self.player.row
+            x = ducks.X.item(row)
+            y = ducks.Y.item(row)
+            if self.walkability.can_move(x, y, TILE_SIZE, TILE_SIZE, dx, dy):
+                ducks.X[row] = x + dx
+                ducks.Y[row] = y + dy
+
+        # Followers walk to the player
+        if self.followers:
+            self.move_followers()
+
+    def move_followers(self):
+        # Every follower at once on the arrays: the ones on their target
+        # tile take the next tile of their path to the player (if not close
+        # enough yet), then all walk towards their target tile
+        ducks = self.ducks
+        rows = self.follower_rows
+        x = ducks.X[rows]
+        y = ducks.Y[rows]
+        target_x = ducks.TARGET_X[rows]
+        target_y = ducks.TARGET_Y[rows]
+
+        # Distance to the target tiles (pixels)
+        dx = target_x * TILE_SIZE - x
+        dy = target_y * TILE_SIZE - y
+
+        arrived = np.flatnonzero((dx == 0) & (dy == 0))
+        if len(arrived):
+            goal = self.player.tile()
+            path = self.navigator.path
+            distance = ducks.DISTANCE[rows]
+            for i in arrived.tolist():
+                steps = path((target_x.item(i), target_y.item(i)), goal)
+                if steps is not None and len(steps) - 1 > distance.item(i):
+                    tx, ty = steps[1]
+                    target_x[i] = tx
+                    target_y[i] = ty
+                    dx[i] = tx * TILE_SIZE - x.item(i)
+                    dy[i] = ty * TILE_SIZE - y.item(i)
+
+        # Walk to the target tiles (views: writes go to the store)
+        speed = Follower.SPEED
+        x += np.minimum(np.maximum(dx, -speed, out = dx), speed, out = dx)
+        y += np.minimum(np.maximum(dy, -speed, out = dy), speed, out = dy)
+
+    def sprite(self, duck = None):
+        # Sprite position of a duck (the player by default) in the image
+        # bank
+        duck = duck or self.player
+        return self.clips.frame(self.walk_clip, duck.ANIMATION_PHASE)
+
+
+
+def new_game(tilemap, followers = 0):
+    # Fresh game state on the world of a tilemap
+    return DuckGame(walkability(tilemap), followers)
@@ -0,0 +1,139 @@
+# ======================================================================
+# THE LITTLE DUCK - NAVIGATION
+# ======================================================================
+# A* paths between tiles of the world, for the ducks walking on their own.
+# Ducks walk one tile at a time in 4 directions, so the navigation grid is
+# the walkability map (one byte per tile, read once from the tilemap).
+#
+# Paths go in an LRU cache keyed by (start tile, goal tile, map version):
+# ducks following the same target ask the same paths again and again. The
+# cache is emptied only when a tile changes walkability (the map version
+# goes up), e.g.
+#
+#   navigator = Navigator(walkability)
+#   navigator.path((10, 4), (2, 12))    # ((10, 4), (10, 5), ... (2, 12))
+
+import heapq
+from collections import OrderedDict
+
+
+
+# Paths kept in the cache
+CACHE_SIZE = 512
+
+# Neighbor tiles
+STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+# Cache lookups of paths not found
+MISSING = object()
+
+
+
+class Navigator:
+    def __init__(self, walkability, cache_size = CACHE_SIZE):
+        self.walkability = walkability
+
+        # (start, goal, version) -> path, least recently used first
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.version = walkability.version
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+
+
+    def path(self, start, goal):
+        # Tiles from start to goal (both in), None if goal cannot be reached
+        version = self.walkability.version
+        if version != self.version:
+            self.cache.clear()
+            self.version = version
+
+        key = (start, goal, version)
+        path = self.cache.get(key, MISSING)
+        if path is not MISSING:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return path
+
+        self.misses += 1
+        path = self.search(start, goal)
+        self.cache[key] = path
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last = False)
+        return path
+
+
+    def search(self, start, goal):
+        # A* on the walkability cells, Manhattan distance to the goal
+        walkability = self.walkability
+        if not walkability.is_walkable(*start) or not walkability.is_walkable(*goal):
+            return None
+
+        width = walkability.width
+        height = walkability.height
+        cells = walkability.cells
+        goal_x, goal_y = goal
+        start_index = start[1] * width + start[0]
+        goal_index = goal_y * width + goal_x
+
+        # Open tiles by (estimated total cost, cost so far), best known
+        # cost and previous tile of each tile seen
+        open_tiles = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, start_index)]
+        cost = {start_index: 0}
+        previous = {start_index: -1}
+
+        while open_tiles:
+            _, steps, index = heapq.heappop(open_tiles)
+            if index == goal_index:
+                break
+
+            # Tile already reached by a shorter path
+            if steps > cost[index]:
+                continue
+
+            ty, tx = divmod(index, width)
+            steps += 1
+            for dx, dy in STEPS:
+                nx = tx + dx
+                ny = ty + dy
+                if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                    continue
+
+                neighbor = ny * width + nx
+                if cells[neighbor] and steps < cost.get(neighbor, steps + 1):
+                    cost[neighbor] = steps
+                    previous[neighbor] = index
+                    heapq.heappush(
+                        open_tiles,
+                        (steps + abs(nx - goal_x) + abs(ny - goal_y), steps, neighbor)
+                    )
+        else:
+            return None
+
+        # Walk back from the goal
+        path = []
+        index = goal_index
+        while index != -1:
+            path.append((index % width, index // width))
+            index = previous[index]
+        path.reverse()
+        return tuple(path)
+
+
+    def reachable(self, start):
+        # Tiles reachable from start, nearest first (breadth-first)
+        walkability = self.walkability
+        if not walkability.is_walkable(*start):
+            return []
+
+        tiles = [start]
+        seen = {start}
+        for tx, ty in tiles:
+            for dx, dy in STEPS:
+                tile = (tx + dx, ty + dy)
+                if tile not in seen and walkability.is_walkable(*tile):
+                    seen.add(tile)
+                    tiles.append(tile)
+        return tiles
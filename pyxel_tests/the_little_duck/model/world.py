@@ -0,0 +1,33 @@
+# ======================================================================
+# THE LITTLE DUCK - WORLD
+# ======================================================================
+# World dimensions and tiles, and its walkability read from a tilemap
+# (pyxel's, the stub's, or any object with pget).
+
+from model.collision import WalkabilityMap
+
+
+
+TILE_SIZE = 8
+
+
+
+class World():
+    HEIGHT = 16
+    WIDTH = 16
+
+    # World items
+    GROUND = (0, 0)
+    TREE = (1, 0)
+
+
+
+def walkability(tilemap):
+    # Walkable tiles, read once from the tilemap
+    return WalkabilityMap.from_tilemap(
+        tilemap = tilemap,
+        width = World.WIDTH,
+        height = World.HEIGHT,
+        tile_size = TILE_SIZE,
+        walkable = [World.GROUND]
+    )